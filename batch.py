@@ -0,0 +1,137 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import chair
+
+'''
+Runs chair.py over many data directories at once (e.g. SIGGRAPH, SIGGRAPH Asia
+and archived years), each through read_papers -> read_reviews -> write_chair,
+in a pool of worker processes:
+
+    python batch.py data/sa24 data/s25 data/s25_archive
+    python batch.py --manifest dirs.txt
+
+A manifest lists one directory per line (blank lines and # comments are
+ignored; relative paths are relative to the manifest).
+
+Each directory gets its own chair.csv as usual, and one combined summary is
+written with a row per directory:
+* batch_summary.csv: Dir,Papers,Reviewed,Exceptions,Missing,Reject,Tabled,Conference,Journal,Top,Mean Score,Seconds
+'''
+
+STATUSES = chair.STATUSES
+SUMMARY_HEADER = ('Dir,Papers,Reviewed,Exceptions,Missing,' + ','.join(STATUSES)
+                  + ',Top,Mean Score,Seconds\n')
+
+def read_manifest(manifest_file):
+    base = os.path.dirname(manifest_file)
+    dirs = []
+    with open(manifest_file, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                dirs.append(os.path.join(base, line))
+    return dirs
+
+# summary of one directory's results (see write_chair for result tuples)
+def summarize(data_dir, results, exceptions, reviews, seconds):
+    summary = {
+        'Dir': data_dir,
+        'Papers': len(results),
+        'Reviewed': len(reviews),
+        'Exceptions': len(exceptions),
+        'Missing': 0,
+        'Top': 0,
+    }
+    for status in STATUSES:
+        summary[status] = 0
+    total = 0
+    scored = 0
+    for pid, score, status, _, tags in results:
+        summary[status] = summary.get(status, 0) + 1
+        if tags == 'Top':
+            summary['Top'] += 1
+        if pid in exceptions:
+            continue
+        if pid not in reviews:
+            summary['Missing'] += 1
+            continue
+        total += score
+        scored += 1
+    summary['Mean Score'] = round(total / scored, 3) if scored else 0
+    summary['Seconds'] = round(seconds, 3)
+    return summary
+
+# runs in a worker process
+def process_dir(data_dir, papers, reviews_name, chair_name, partition):
+    start = time.perf_counter()
+    papers_file = f'{data_dir}/{papers}'
+    reviews_file = f'{data_dir}/{reviews_name}'
+    chair_file = f'{data_dir}/{chair_name}'
+    all_pids, dual_pids, exceptions, rooms, areas = chair.read_papers(papers_file)
+    reviews = chair.read_reviews(all_pids, reviews_file)
+    partitions = [rooms, areas] if partition else []
+    results = chair.write_chair(all_pids, dual_pids, exceptions, reviews, chair_file, partitions)
+    return summarize(data_dir, results, exceptions, reviews, time.perf_counter() - start)
+
+def format_summary(summary):
+    fields = [summary['Dir'], summary['Papers'], summary['Reviewed'],
+              summary['Exceptions'], summary['Missing']]
+    fields += [summary[status] for status in STATUSES]
+    fields += [summary['Top'], summary['Mean Score'], summary['Seconds']]
+    return ','.join(str(field) for field in fields) + '\n'
+
+def run_batch(dirs, papers, reviews, chair_name, partition, workers=None):
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_dir, d, papers, reviews, chair_name, partition)
+                   for d in dirs]
+        for d, future in zip(dirs, futures):
+            try:
+                summaries.append(future.result())
+            except Exception as e: # e.g. csv.Error, or BrokenProcessPool if a worker died
+                print(f'Warning! {d} failed: {type(e).__name__}: {e}')
+    return summaries
+
+def write_summary(summaries, summary_file):
+    with open(summary_file, 'w') as f:
+        f.write(SUMMARY_HEADER)
+        for summary in summaries:
+            f.write(format_summary(summary))
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('dirs', nargs='*',
+                        help='directories of input/output CSVs')
+    parser.add_argument('--manifest',
+                        help='file listing more directories, one per line')
+    parser.add_argument('--papers', default='papers.csv',
+                        help='filename of input papers CSV in each directory')
+    parser.add_argument('--reviews', default='reviews.csv',
+                        help='filename of input reviews CSV in each directory')
+    parser.add_argument('--chair', default='chair.csv',
+                        help='filename of output chair CSV in each directory')
+    parser.add_argument('--partition', action='store_true',
+                        help='also write one chair CSV per room and per area')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: one per core)')
+    parser.add_argument('--summary', default='batch_summary.csv',
+                        help='filename of output combined summary CSV')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    dirs = list(args.dirs)
+    if args.manifest:
+        dirs += read_manifest(args.manifest)
+    start = time.perf_counter()
+    summaries = run_batch(dirs, args.papers, args.reviews, args.chair,
+                          args.partition, args.workers)
+    write_summary(summaries, args.summary)
+    seconds = round(time.perf_counter() - start, 3)
+    print(f'processed {len(summaries)} of {len(dirs)} directories in {seconds}s, '
+          f'summary in {args.summary}')
+
+if __name__ == "__main__":
+    main()
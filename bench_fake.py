@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+
+'''
+Times fake.py end to end (interpreter start to exit) for a small dataset,
+in the default mode (numpy + Faker) and in --lite mode:
+
+    python bench_fake.py --runs 5 --num_papers 20
+
+The default mode is skipped, with a note, when numpy or Faker isn't installed.
+'''
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def time_run(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, f'{HERE}/fake.py'] + args,
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def bench(name, args, runs):
+    times = [time_run(args) for _ in range(runs)]
+    best = min(times)
+    mean = sum(times) / len(times)
+    print(f'{name}: best {best * 1000:.1f} ms, mean {mean * 1000:.1f} ms over {runs} runs')
+    return best
+
+def has_full_deps():
+    return all(importlib.util.find_spec(m) for m in ['numpy', 'faker'])
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5,
+                        help='runs per mode')
+    parser.add_argument('--num_users', type=int, default=10,
+                        help='users per dataset')
+    parser.add_argument('--num_papers', type=int, default=20,
+                        help='papers per dataset')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        common = ['--dir', tmp_dir, '--num_users', str(args.num_users),
+                  '--num_papers', str(args.num_papers)]
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        print(f'bare interpreter: {(time.perf_counter() - start) * 1000:.1f} ms')
+        lite = bench('fake.py --lite', common + ['--lite'], args.runs)
+        if has_full_deps():
+            full = bench('fake.py', common, args.runs)
+            print(f'--lite is {full / lite:.1f}x faster')
+        else:
+            print('fake.py (numpy + Faker) skipped: not installed')
+
+if __name__ == "__main__":
+    main()
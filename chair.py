@@ -1,5 +1,19 @@
+import os
+import re
 import csv
+import heapq
+import hashlib
 import argparse
+import zlib
+import time
+import operator
+import functools
+import tempfile
+import contextlib
+import store
+import snapshots
+import fetch
+import chairbin
 
 '''
 Reads a pair of files that look like this:
@@ -9,6 +23,33 @@ Reads a pair of files that look like this:
 Writes a file that looks like this:
 * chair.csv: Submission ID,Sort Score,Status,Reviews,Tags
 
+Optionally (--partition) also writes the same rows split per room and per area,
+e.g. chair_Room_1A.csv or chair_Modeling_Geometry.csv, next to chair.csv.
+
+Optionally (--stats) also writes per-paper stats for plot.py, computed in the
+same pass as chair.csv (papers with reviews and no exception only; the
+Conf/Journal Mean is blank for journal-only papers):
+* stats.csv: Submission ID,Dual Track,Mean Score,Conf/Journal Mean,Reviews,Status
+
+Optionally (--cluster_stats) also joins clusters.csv (Submission ID,Cluster)
+and writes per-cluster aggregates, accumulated in the same pass as chair.csv.
+Score columns cover papers with reviews and no exception (blank if there are
+none); counts cover all papers in the cluster (papers without a cluster are
+left out, and a missing clusters.csv just gives no clusters):
+* cluster_stats.csv: Cluster,Papers,Scored,Mean Score,Std Dev,Min Score,Max Score,Reject,Tabled,Conference,Journal,Top
+
+Optionally (--delta) also writes only the rows that differ from the previous
+run, with an extra Change column (added, changed or removed):
+* chair_delta.csv: Submission ID,Sort Score,Status,Reviews,Tags,Change
+The previous run is remembered in a small manifest of per-paper line hashes
+(chair_manifest.csv: Submission ID,Hash); without one, the old chair.csv is used.
+
+Optionally (--binary) also writes the results in a columnar binary format
+that can be memory-mapped (see chairbin.py).
+
+Optionally (--log) also appends the same kind of changed rows to a versioned,
+append-only log of every run (see snapshots.py for the format and queries).
+
 Relies on notes on review scores from Mark L Feb 2025:
 
 Score
@@ -45,6 +86,21 @@ Top 5%
 # globals
 verbose = False
 
+CHAIR_HEADER = 'Submission ID,Sort Score,Status,Reviews,Tags\n'
+STATS_HEADER = 'Submission ID,Dual Track,Mean Score,Conf/Journal Mean,Reviews,Status\n'
+STATUSES = ['Reject', 'Tabled', 'Conference', 'Journal']
+CLUSTER_STATS_HEADER = ('Cluster,Papers,Scored,Mean Score,Std Dev,Min Score,Max Score,'
+                        + ','.join(STATUSES) + ',Top\n')
+WRITE_BUFFER_SIZE = 1 << 16
+# rendered "[R, A, a]" and "(C, c, j)" fragments kept, per kind (LRU)
+FRAGMENT_CACHE_SIZE = 4096
+# rough bytes of Python memory per byte of reviews.csv, once parsed into tuples
+REVIEWS_MEMORY_FACTOR = 2
+# spill partition files are all open at once, so stay well under open-file
+# limits (256 by default on macOS, see get_max_spill_partitions); a tiny
+# budget just gets bigger partitions
+MAX_SPILL_PARTITIONS = 128
+
 def read_csv_rows(reader):
     rows = []
     skip_header = True
@@ -61,26 +117,52 @@ def read_csv(fname):
         rows = read_csv_rows(reader)
         return rows
 
+# like read_csv, but yields rows one at a time instead of building a list
+def iter_csv(fname):
+    with open(fname, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None) # skip header
+        yield from reader
+
 
 # papers.csv: Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract
-# pull out: IDs, Exceptions, Tracks
+# pull out: IDs, Exceptions, Tracks, Rooms, Areas
 # track is either: "Dual Track" or "Journal Only Track"
-def read_papers(papers_file):
+def read_papers(papers_file, validator=None):
+    rows = read_csv(papers_file)
+    return papers_from_rows(rows, validator)
+
+def papers_from_rows(rows, validator=None):
     all_pids = []
     dual_pids = []
     exceptions = {}
-    rows = read_csv(papers_file)
+    rooms = {}
+    areas = {}
     for row in rows:
+        if validator and not validator.check_paper_row(row):
+            continue
         pid = row[0]
         exception = row[1]
+        area = row[4]
         track = row[5]
+        room = row[6] if len(row) > 6 else '' # older exports have no Room column
         all_pids.append(pid)
         if track == 'Dual Track':
             dual_pids.append(pid)
         if exception:
             exceptions[pid] = exception
-    return all_pids, dual_pids, exceptions
-
+        if room:
+            rooms[pid] = room
+        if area:
+            areas[pid] = area
+    return all_pids, dual_pids, exceptions, rooms, areas
+
+# clusters.csv: Submission ID,Cluster; a missing file means no clusters
+def read_clusters(clusters_file):
+    if not os.path.exists(clusters_file):
+        print(f'Warning! {clusters_file} not found, no cluster stats')
+        return {}
+    return {row[0]: row[1] for row in iter_csv(clusters_file) if len(row) > 1}
 
 '''
 known options:
@@ -162,12 +244,19 @@ def row_to_pid_rev(row):
     rev_tuple = (role, score, final_rec, conf_jour, top)
     return pid, rev_tuple
 
-def read_reviews(all_pids, reviews_file):
+def read_reviews(all_pids, reviews_file, validator=None):
+    rows = iter_csv(reviews_file)
+    return reviews_from_rows(all_pids, rows, validator)
+
+# with a validator, rows it rejects (e.g. non-numeric scores) are skipped
+def reviews_from_rows(all_pids, rows, validator=None):
     reviews = {}
-    rows = read_csv(reviews_file)
+    known_pids = set(all_pids)
     for row in rows:
+        if validator and not validator.check_review_row(row, known_pids):
+            continue
         pid, rev_tuple = row_to_pid_rev(row)
-        if pid not in all_pids:
+        if pid not in known_pids:
             continue # ignore reviews for papers not in the papers file
         if pid not in reviews:
             reviews[pid] = []
@@ -197,12 +286,18 @@ def format_conf_jour_codes(c):
         return conf_jour_codes[c]
     return '?'
 
+# scores and codes are tuples, so the rendered fragment can be cached. The key
+# is the ordered tuple, which rarely repeats: on fake data the score cache hits
+# about 3% of papers at 200, 20% at 2,000 and 55% at 20,000, and the codes
+# cache less, so it saves little; --profile reports the hits for real data
+@functools.lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
 def format_score_list(scores):
     scores = [ format_score_codes(s) for s in scores]
     scores = ', '.join(scores)
     scores = f'[{scores}]'
     return scores
 
+@functools.lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
 def format_conf_jour_list(codes):
     codes = [ format_conf_jour_codes(c) for c in codes]
     codes = ', '.join(codes)
@@ -214,50 +309,494 @@ def scores_ave(scores):
     ave = round(ave, 3)
     return ave
 
-# output: Submission ID,Sort Score,Status,Reviews,Tags
-def format_pid_with_reviews(pid, is_dual, revs):
-    revs.sort(key=lambda row: row[0]) # sort by role (first column)
+# result: (Submission ID, Sort Score, Status, Reviews, Tags)
+# stats: (Submission ID, Dual Track, Mean Score, Conf/Journal Mean, Reviews, Status)
+# each get_result_* returns both; stats is None without reviews
+def get_result_with_reviews(pid, is_dual, revs):
+    revs.sort(key=operator.itemgetter(0)) # sort by role (first column)
     status = get_status_from_pri_sec(revs)
-    scores = [get_score_from_review(rev) for rev in revs]
+    scores = tuple([get_score_from_review(rev) for rev in revs])
     ave = scores_ave(scores)
     scores = format_score_list(scores)
     top_recs = [get_top_from_review(rev) for rev in revs]
     sum_top = sum(top_recs)
     tags = 'Top' if sum_top > 1 else ''
+    conf_jour = tuple([get_conf_from_review(rev) for rev in revs])
+    # conf/journal codes only mean something for dual-track papers
+    conf_jour_ave = scores_ave(conf_jour) if is_dual else ''
+    stats = (pid, is_dual, ave, conf_jour_ave, len(revs), status)
     if is_dual:
-        conf_jour = [get_conf_from_review(rev) for rev in revs]
         conf_jour = format_conf_jour_list(conf_jour)
     else:
         conf_jour = '(J only)'
-    line = f'{pid},{ave},{status},"{conf_jour} {scores} bbs:{status}",{tags}\n'
-    return line
+    result = (pid, ave, status, f'{conf_jour} {scores} bbs:{status}', tags)
+    return result, stats
+
+def get_result_with_exception(pid, exception):
+    return (pid, -6, 'Reject', f'Exception: {exception}', ''), None
 
-def format_pid_with_exception(pid, exception):
-    line = f'{pid},-6,Reject,"Exception: {exception}",\n'
-    return line
+def get_result_with_no_reviews(pid):
+    return (pid, -5, 'Tabled', '(Missing reviews!)', ''), None
 
-def format_pid_with_no_reviews(pid):
-    line = f'{pid},-5,Tabled,"(Missing reviews!)",\n'    
-    return line
+def get_pid_result(pid, dual_pids, exceptions, reviews):
+    if pid in exceptions:
+        return get_result_with_exception(pid, exceptions[pid])
+    if pid in reviews:
+        is_dual = pid in dual_pids
+        return get_result_with_reviews(pid, is_dual, reviews[pid])
+    return get_result_with_no_reviews(pid)
+
+def get_sort_score_from_result(result):
+    return result[1]
+
+# output: Submission ID,Sort Score,Status,Reviews,Tags
+def format_result(result):
+    pid, score, status, reviews, tags = result
+    return f'{pid},{score},{status},"{reviews}",{tags}\n'
+
+# output: Submission ID,Dual Track,Mean Score,Conf/Journal Mean,Reviews,Status
+def format_stats(stats):
+    pid, is_dual, ave, conf_jour_ave, count, status = stats
+    return f'{pid},{is_dual},{ave},{conf_jour_ave},{count},{status}\n'
+
+# running aggregates for one cluster, updated once per paper (Welford's
+# method for the spread, so no second pass over the scores is needed)
+class ClusterStats:
+    def __init__(self):
+        self.papers = 0
+        self.scored = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.statuses = dict.fromkeys(STATUSES, 0)
+        self.top = 0
+
+    def add(self, result, stats):
+        _, score, status, _, tags = result
+        self.papers += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if tags == 'Top':
+            self.top += 1
+        if stats is None:
+            return # sort scores of exceptions and missing reviews are placeholders
+        self.scored += 1
+        delta = score - self.mean
+        self.mean += delta / self.scored
+        self.m2 += delta * (score - self.mean)
+        self.min = score if self.min is None else min(self.min, score)
+        self.max = score if self.max is None else max(self.max, score)
+
+    def std_dev(self):
+        return (self.m2 / self.scored) ** 0.5 if self.scored else 0
+
+# output: Cluster,Papers,Scored,Mean Score,Std Dev,Min Score,Max Score,Reject,Tabled,Conference,Journal,Top
+def format_cluster_stats(cluster, acc):
+    fields = [cluster, acc.papers, acc.scored]
+    if acc.scored:
+        # + 0.0 turns a -0.0 from rounding (or Welford's drift) into 0.0
+        fields += [round(acc.mean, 3) + 0.0, round(acc.std_dev(), 3) + 0.0, acc.min, acc.max]
+    else:
+        fields += [''] * 4 # no reviewed papers, so no score aggregates
+    fields += [acc.statuses[status] for status in STATUSES]
+    fields.append(acc.top)
+    return ','.join(str(field) for field in fields) + '\n'
+
+def write_cluster_stats(cluster_stats, cluster_stats_file):
+    with open(cluster_stats_file, 'w') as f:
+        f.write(CLUSTER_STATS_HEADER)
+        for cluster in sorted(cluster_stats):
+            f.write(format_cluster_stats(cluster, cluster_stats[cluster]))
 
 def write_file(fname, contents):
     path = f'{fname}'
     with open(path, 'w') as f:
         f.write(contents)
 
-def write_chair(all_pids, dual_pids, exceptions, reviews, chair_file):
-    lines = 'Submission ID,Sort Score,Status,Reviews,Tags\n'
-    for pid in all_pids:
-        if pid in exceptions:
-            exception = exceptions[pid]
-            lines += format_pid_with_exception(pid, exception)
-        elif pid in reviews:
-            pid_revs = reviews[pid]
-            is_dual = pid in dual_pids
-            lines += format_pid_with_reviews(pid, is_dual, pid_revs)
+# chair.csv -> chair_Room_1A.csv, chair_Modeling_Geometry.csv, etc.;
+# a name already taken by another key (e.g. "Modeling/Geometry" and
+# "Modeling Geometry", or a room and an area with the same value) gets a
+# numeric suffix, chair_Modeling_Geometry_2.csv, instead of overwriting it
+def partition_file_name(chair_file, value, taken):
+    base, ext = os.path.splitext(chair_file)
+    value = re.sub(r'[^A-Za-z0-9]+', '_', value).strip('_')
+    fname = f'{base}_{value}{ext}'
+    n = 2
+    while fname in taken:
+        fname = f'{base}_{value}_{n}{ext}'
+        n += 1
+    return fname
+
+# key None is the global chair file, otherwise (partition index, value);
+# every handle is opened once, buffered, and keeps its file name in handles
+def get_partition_handle(stack, handles, chair_file, key):
+    if key not in handles:
+        taken = {f.name for f in handles.values()}
+        if key is None:
+            fname = chair_file
         else:
-            lines += format_pid_with_no_reviews(pid)
-    write_file(chair_file,lines)
+            fname = partition_file_name(chair_file, key[1], taken | {chair_file})
+        f = stack.enter_context(open(fname, 'w', buffering=WRITE_BUFFER_SIZE))
+        f.write(CHAIR_HEADER)
+        handles[key] = f
+    return handles[key]
+
+# keeps every line, or (with top) a min-heap of only the best top lines
+def add_sorted_line(buffers, key, score, seq, line, top):
+    buf = buffers.setdefault(key, [])
+    item = (score, -seq, line) # ties keep paper order
+    if not top:
+        buf.append(item)
+    elif len(buf) < top:
+        heapq.heappush(buf, item)
+    else:
+        heapq.heappushpop(buf, item)
+
+def sorted_lines(buf):
+    buf.sort(reverse=True) # highest sort score first
+    return [line for _, _, line in buf]
+
+# keys are namespaced by partition, so a room and an area with the same
+# value are still different files
+def get_partition_keys(pid, partitions):
+    keys = [None]
+    for i, partition in enumerate(partitions):
+        value = partition.get(pid)
+        if value:
+            keys.append((i, value))
+    return keys
+
+# partitions is a list of dicts (e.g. rooms, areas) mapping pid -> key;
+# each paper is formatted once and written to the global file plus its partitions.
+# sort orders every file by Sort Score; top keeps only the best top per partition.
+# stats_file (optional) gets the stats from the same per-paper computation.
+# pid_results (optional) maps pid -> (result, stats) already computed
+# elsewhere (see compute_results_spilled), in which case reviews is unused.
+# clusters (optional) maps pid -> cluster; each paper is added to its
+# cluster's aggregates, written to cluster_stats_file at the end.
+# returns the list of results, in paper order.
+def write_chair(all_pids, dual_pids, exceptions, reviews, chair_file,
+                partitions=(), sort=False, top=0, stats_file=None, pid_results=None,
+                clusters=None, cluster_stats_file=None):
+    sort = sort or top > 0
+    results = []
+    cluster_stats = {}
+    handles = {}
+    buffers = {}
+    with contextlib.ExitStack() as stack:
+        get_partition_handle(stack, handles, chair_file, None)
+        stats_f = None
+        if stats_file:
+            stats_f = stack.enter_context(open(stats_file, 'w', buffering=WRITE_BUFFER_SIZE))
+            stats_f.write(STATS_HEADER)
+        for seq, pid in enumerate(all_pids):
+            if pid_results is None:
+                result, stats = get_pid_result(pid, dual_pids, exceptions, reviews)
+            else:
+                result, stats = pid_results[pid]
+            results.append(result)
+            if stats_f and stats:
+                stats_f.write(format_stats(stats))
+            if clusters:
+                cluster = clusters.get(pid)
+                if cluster:
+                    if cluster not in cluster_stats:
+                        cluster_stats[cluster] = ClusterStats()
+                    cluster_stats[cluster].add(result, stats)
+            line = format_result(result)
+            for key in get_partition_keys(pid, partitions):
+                if sort:
+                    score = get_sort_score_from_result(result)
+                    key_top = top if key is not None else 0
+                    add_sorted_line(buffers, key, score, seq, line, key_top)
+                else:
+                    get_partition_handle(stack, handles, chair_file, key).write(line)
+        for key, buf in buffers.items():
+            f = get_partition_handle(stack, handles, chair_file, key)
+            f.writelines(sorted_lines(buf))
+    if cluster_stats_file:
+        write_cluster_stats(cluster_stats, cluster_stats_file)
+    return results
+
+'''
+Memory budget (--memory-budget): the size of reviews.csv is checked up front.
+If the parsed reviews would not fit in the budget, the rows are spilled to
+temp files partitioned by a hash of Submission ID, and each partition is read
+and computed on its own. Only the per-paper results are kept in memory, and
+they are written out in paper order, so the output is the same either way.
+'''
+
+# "512M" -> 536870912; plain numbers are bytes
+def parse_memory_size(s):
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    s = s.strip().upper().rstrip('B')
+    if s and s[-1] in units:
+        return int(float(s[:-1]) * units[s[-1]])
+    return int(s)
+
+def estimate_reviews_memory(reviews_file):
+    return os.path.getsize(reviews_file) * REVIEWS_MEMORY_FACTOR
+
+# MAX_SPILL_PARTITIONS, or at most half the open-file limit if that is lower
+def get_max_spill_partitions():
+    try:
+        import resource # not on Windows
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return MAX_SPILL_PARTITIONS
+    if soft == resource.RLIM_INFINITY:
+        return MAX_SPILL_PARTITIONS
+    return max(2, min(MAX_SPILL_PARTITIONS, soft // 2))
+
+# 0 when the reviews fit in the budget, otherwise how many partitions to use
+def get_spill_partitions(reviews_file, budget):
+    if not budget:
+        return 0
+    estimate = estimate_reviews_memory(reviews_file)
+    if estimate <= budget:
+        return 0
+    return min(get_max_spill_partitions(), max(2, -(-estimate // budget))) # ceiling
+
+def get_spill_partition(pid, num_partitions):
+    return zlib.crc32(pid.encode()) % num_partitions
+
+# returns pid -> (result, stats) for every paper, and the set of reviewed pids
+def compute_results_spilled(all_pids, dual_pids, exceptions, reviews_file,
+                            num_partitions, validator=None):
+    known_pids = set(all_pids)
+    dual_pids = set(dual_pids)
+    reviewed = set()
+    pid_results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fnames = [f'{tmp_dir}/reviews_{k}.csv' for k in range(num_partitions)]
+        with contextlib.ExitStack() as stack:
+            writers = [csv.writer(stack.enter_context(open(fname, 'w', newline='')))
+                       for fname in fnames]
+            for row in iter_csv(reviews_file):
+                if validator and not validator.check_review_row(row, known_pids):
+                    continue
+                pid = row[0]
+                if pid not in known_pids:
+                    continue # ignore reviews for papers not in the papers file
+                reviewed.add(pid)
+                writers[get_spill_partition(pid, num_partitions)].writerow(row)
+        pids_by_partition = [[] for _ in fnames]
+        for pid in all_pids:
+            pids_by_partition[get_spill_partition(pid, num_partitions)].append(pid)
+        for fname, pids in zip(fnames, pids_by_partition):
+            with open(fname, 'r', newline='') as f:
+                reviews = reviews_from_rows(pids, csv.reader(f))
+            for pid in pids:
+                pid_results[pid] = get_pid_result(pid, dual_pids, exceptions, reviews)
+    return pid_results, reviewed
+
+# local files are read directly; URLs are all fetched at once (see fetch.py)
+def read_input_rows(fnames, cache_dir):
+    urls = [fname for fname in fnames if fetch.is_url(fname)]
+    fetched = {}
+    if urls:
+        fetched = dict(zip(urls, fetch.fetch_all_csv_rows(urls, cache_dir)))
+    return [fetched[fname] if fname in fetched else read_csv(fname) for fname in fnames]
+
+# --db: upsert the CSV inputs (if present) into SQLite, then read them back
+# with indexed queries; the results are stored in the chair table too
+def read_inputs_from_db(conn, papers_file, reviews_file, skip_ingest, cache_dir,
+                        validator=None):
+    if not skip_ingest:
+        sources = [(table, fname) for table, fname in
+                   [('papers', papers_file), ('reviews', reviews_file)]
+                   if fetch.is_url(fname) or os.path.exists(fname)]
+        fnames = [fname for _, fname in sources]
+        for (table, _), rows in zip(sources, read_input_rows(fnames, cache_dir)):
+            changes = store.ingest_rows(conn, table, rows)
+            if verbose:
+                print(f'{table}: {changes} rows changed in database')
+    papers_rows = store.read_papers_rows(conn)
+    all_pids, dual_pids, exceptions, rooms, areas = papers_from_rows(papers_rows, validator)
+    reviews = reviews_from_rows(all_pids, store.read_reviews_rows(conn), validator)
+    return all_pids, dual_pids, exceptions, rooms, areas, reviews
+
+def hash_line(line):
+    return hashlib.blake2b(line.encode(), digest_size=8).hexdigest()
+
+def get_pid_from_line(line):
+    return line.split(',', 1)[0]
+
+# manifest: Submission ID,Hash
+def read_manifest(manifest_file):
+    hashes = {}
+    for pid, digest in read_csv(manifest_file):
+        hashes[pid] = digest
+    return hashes
+
+# falls back on hashing each line of the previous chair.csv
+def read_chair_hashes(chair_file):
+    hashes = {}
+    with open(chair_file, 'r') as f:
+        next(f, None) # skip header
+        for line in f:
+            hashes[get_pid_from_line(line)] = hash_line(line)
+    return hashes
+
+# must run before chair_file is overwritten
+def read_previous_hashes(chair_file, manifest_file):
+    if os.path.exists(manifest_file):
+        return read_manifest(manifest_file)
+    if os.path.exists(chair_file):
+        return read_chair_hashes(chair_file)
+    return {}
+
+def write_manifest(manifest_file, hashes):
+    with open(manifest_file, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write('Submission ID,Hash\n')
+        for pid, digest in hashes.items():
+            f.write(f'{pid},{digest}\n')
+
+# rows added or changed since the previous run, then removed pids, each with
+# a trailing Change field; returns the new hashes, the counts, and the lines
+def get_delta_lines(results, old_hashes):
+    hashes = {}
+    counts = {'added': 0, 'changed': 0, 'removed': 0}
+    lines = []
+    for result in results:
+        line = format_result(result)
+        pid = result[0]
+        digest = hash_line(line)
+        hashes[pid] = digest
+        old = old_hashes.get(pid)
+        if old == digest:
+            continue
+        change = 'added' if old is None else 'changed'
+        counts[change] += 1
+        lines.append(line.replace('\n', f',{change}\n'))
+    for pid in old_hashes:
+        if pid not in hashes:
+            counts['removed'] += 1
+            lines.append(f'{pid},,,,,removed\n')
+    return hashes, counts, lines
+
+def write_delta(results, old_hashes, delta_file):
+    hashes, counts, lines = get_delta_lines(results, old_hashes)
+    with open(delta_file, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(CHAIR_HEADER.replace('\n', ',Change\n'))
+        f.writelines(lines)
+    return hashes, counts
+
+# --log: appends only the rows that changed since the last logged run; if the
+# log or its index is missing, the state is stale and every row is logged
+def append_to_log(results, log_file):
+    state_file = snapshots.state_file_name(log_file)
+    old_hashes = {}
+    if snapshots.has_log(log_file) and os.path.exists(state_file):
+        old_hashes = read_manifest(state_file)
+    hashes, counts, lines = get_delta_lines(results, old_hashes)
+    run = snapshots.append_run(log_file, lines)
+    write_manifest(state_file, hashes)
+    return run, counts
+
+'''
+Validation (--validate) happens while papers and reviews are parsed, so it
+costs no extra pass over the files. Each kind of anomaly is counted, and the
+first few examples of each are kept for the report.
+'''
+class Validator:
+    def __init__(self, max_samples=5):
+        self.max_samples = max_samples
+        self.counts = {}
+        self.samples = {}
+        self.seen_pids = set()
+        self.roles = {} # pid -> set of primary/secondary role numbers seen
+
+    def note(self, kind, sample):
+        count = self.counts.get(kind, 0)
+        self.counts[kind] = count + 1
+        if count < self.max_samples:
+            self.samples.setdefault(kind, []).append(sample)
+
+    def check_paper_row(self, row):
+        if len(row) < 6: # Room (and Abstract) are optional
+            self.note('short paper row', ','.join(row))
+            return False
+        pid = row[0]
+        if pid in self.seen_pids:
+            self.note('duplicate paper', pid)
+        self.seen_pids.add(pid)
+        if row[5] not in ('Dual Track', 'Journal Only Track'):
+            self.note('unknown track', f'{pid}: {row[5]!r}')
+        return True
+
+    # returns False for rows too broken to use
+    def check_review_row(self, row, known_pids):
+        if len(row) < 7:
+            self.note('short review row', ','.join(row))
+            return False
+        pid, role_name, score, conf_jour, _, final_rec, top = row[:7]
+        try:
+            for field in (score, conf_jour, final_rec, top):
+                if field:
+                    float(field)
+        except ValueError:
+            self.note('non-numeric field', ','.join(row))
+            return False
+        if pid not in known_pids:
+            self.note('review for unknown paper', pid)
+            return True
+        role = get_role_number_from_role(role_name)
+        sample = f'{pid}: {role_name}'
+        if role == 5:
+            self.note('unknown role', sample)
+        if not score:
+            self.note('blank score', sample)
+        elif to_int(score) not in score_codes:
+            self.note('out-of-range score', f'{sample} scored {score}')
+        if not conf_jour:
+            self.note('blank conf/journal rec', sample)
+        elif to_int(conf_jour) not in conf_jour_codes:
+            self.note('out-of-range conf/journal rec', f'{sample} rec {conf_jour}')
+        if role in (1, 2):
+            roles = self.roles.setdefault(pid, set())
+            if role in roles:
+                self.note('duplicate primary/secondary role', sample)
+            roles.add(role)
+            if not final_rec:
+                self.note('missing final recommendation', sample)
+            elif to_int(final_rec) not in (-1, 0, 1, 2):
+                self.note('out-of-range final recommendation', f'{sample} rec {final_rec}')
+        return True
+
+    # checks over the parsed papers and reviews (not the files) once both are read
+    def finish(self, all_pids, exceptions, reviews):
+        for pid in all_pids:
+            if pid in exceptions:
+                continue
+            if pid not in reviews:
+                self.note('paper without reviews', pid)
+                continue
+            roles = self.roles.get(pid, set())
+            if 1 not in roles:
+                self.note('missing primary', pid)
+            if 2 not in roles:
+                self.note('missing secondary', pid)
+
+    def report(self):
+        if not self.counts:
+            print('Validation: no problems found')
+            return
+        print('Validation:')
+        for kind, count in sorted(self.counts.items()):
+            samples = ', '.join(self.samples[kind])
+            print(f'  {kind}: {count} (e.g. {samples})')
+
+# --profile: seconds per phase, then how well the fragment caches did
+def report_profile(timings):
+    for name, seconds in timings:
+        print(f'{name}: {seconds:.3f}s')
+    caches = [('score fragments', format_score_list),
+              ('conf/journal fragments', format_conf_jour_list)]
+    for name, func in caches:
+        info = func.cache_info()
+        print(f'{name} cache: {info.hits} hits, {info.misses} misses, '
+              f'{info.currsize}/{info.maxsize} entries')
 
 def report_array(arr, name):
     print(f'{name} has {len(arr)} entries, starting:')
@@ -274,32 +813,125 @@ def parse_args():
     global verbose
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--profile', action='store_true',
+                        help='print time per phase and formatter cache hits/misses')
     parser.add_argument('--dir', default='data',
                         help='directory for input/output CSVs')
     parser.add_argument('--papers', default='papers.csv',
-                        help='filename of input papers CSV')
+                        help='filename or URL of input papers CSV')
     parser.add_argument('--reviews', default='reviews.csv',
-                        help='filename of input reviews CSV')
+                        help='filename or URL of input reviews CSV')
+    parser.add_argument('--cache', default='url_cache',
+                        help='directory (in --dir) caching CSVs fetched from URLs')
     parser.add_argument('--chair', default='chair.csv',
                         help='filename of output chair CSV')
+    parser.add_argument('--stats', # no default
+                        help='filename of optional output stats CSV (input for plot.py)')
+    parser.add_argument('--clusters', default='clusters.csv',
+                        help='filename of input clusters CSV, read with --cluster_stats')
+    parser.add_argument('--cluster_stats', # no default
+                        help='filename of optional output per-cluster aggregates CSV')
+    parser.add_argument('--memory-budget', dest='memory_budget', default='0',
+                        help='e.g. 512M; if local reviews would need more memory, process them in partitions on disk')
+    parser.add_argument('--validate', action='store_true',
+                        help='report anomalies found while reading papers and reviews')
+    parser.add_argument('--partition', action='store_true',
+                        help='also write one chair CSV per room and per area')
+    parser.add_argument('--sort', action='store_true',
+                        help='sort chair CSVs by Sort Score, highest first')
+    parser.add_argument('--top', type=int, default=0,
+                        help='keep only the top N papers per room/area (implies --sort)')
+    parser.add_argument('--delta', # no default
+                        help='filename of optional output CSV of rows changed since the last run')
+    parser.add_argument('--manifest', default='chair_manifest.csv',
+                        help='with --delta, filename of hashes remembered from the last run')
+    parser.add_argument('--binary', # no default
+                        help='filename of optional columnar binary copy of the chair results')
+    parser.add_argument('--log', # no default
+                        help='filename of optional append-only log of changes per run')
+    parser.add_argument('--db',
+                        help='SQLite file (in --dir) to upsert inputs into, read them from, and store results in')
+    parser.add_argument('--skip_ingest', action='store_true',
+                        help='with --db, use the database as-is without reading the CSVs')
     args = parser.parse_args()
 
     verbose = args.verbose
-    papers_file = f'{args.dir}/{args.papers}'
-    reviews_file = f'{args.dir}/{args.reviews}'
+    papers_file = args.papers if fetch.is_url(args.papers) else f'{args.dir}/{args.papers}'
+    reviews_file = args.reviews if fetch.is_url(args.reviews) else f'{args.dir}/{args.reviews}'
+    args.cache_dir = f'{args.dir}/{args.cache}'
     chair_file = f'{args.dir}/{args.chair}'
-    return papers_file, reviews_file, chair_file
+    args.db_file = f'{args.dir}/{args.db}' if args.db else None
+    args.stats_file = f'{args.dir}/{args.stats}' if args.stats else None
+    args.clusters_file = f'{args.dir}/{args.clusters}'
+    args.cluster_stats_file = f'{args.dir}/{args.cluster_stats}' if args.cluster_stats else None
+    args.memory_budget = parse_memory_size(args.memory_budget)
+    args.delta_file = f'{args.dir}/{args.delta}' if args.delta else None
+    args.manifest_file = f'{args.dir}/{args.manifest}'
+    args.log_file = f'{args.dir}/{args.log}' if args.log else None
+    args.binary_file = f'{args.dir}/{args.binary}' if args.binary else None
+    return papers_file, reviews_file, chair_file, args
 
 def main():
     global verbose
-    papers_file, reviews_file, chair_file = parse_args()
-    all_pids, dual_pids, exceptions = read_papers(papers_file)
-    reviews = read_reviews(all_pids, reviews_file)
+    papers_file, reviews_file, chair_file, args = parse_args()
+    start = time.perf_counter()
+    conn = None
+    pid_results = None
+    validator = Validator() if args.validate else None
+    if args.db_file:
+        conn = store.connect(args.db_file)
+        all_pids, dual_pids, exceptions, rooms, areas, reviews = read_inputs_from_db(
+            conn, papers_file, reviews_file, args.skip_ingest, args.cache_dir, validator)
+    elif fetch.is_url(papers_file) or fetch.is_url(reviews_file):
+        papers_rows, reviews_rows = read_input_rows([papers_file, reviews_file], args.cache_dir)
+        all_pids, dual_pids, exceptions, rooms, areas = papers_from_rows(papers_rows, validator)
+        reviews = reviews_from_rows(all_pids, reviews_rows, validator)
+    else:
+        all_pids, dual_pids, exceptions, rooms, areas = read_papers(papers_file, validator)
+        num_partitions = get_spill_partitions(reviews_file, args.memory_budget)
+        if num_partitions:
+            if verbose:
+                print(f'reviews over memory budget, using {num_partitions} partitions on disk')
+            pid_results, reviews = compute_results_spilled(
+                all_pids, dual_pids, exceptions, reviews_file, num_partitions, validator)
+        else:
+            reviews = read_reviews(all_pids, reviews_file, validator)
+    if validator:
+        validator.finish(all_pids, exceptions, reviews)
+        validator.report()
     if verbose:
         report_array(all_pids, 'all_pids')
-        report_dict(reviews, 'reviews')
+        if pid_results is None:
+            report_dict(reviews, 'reviews')
         report_dict(exceptions, 'exceptions')
-    write_chair(all_pids, dual_pids, exceptions, reviews, chair_file)
+    partitions = [rooms, areas] if args.partition else []
+    clusters = read_clusters(args.clusters_file) if args.cluster_stats_file else None
+    if args.delta_file:
+        old_hashes = read_previous_hashes(chair_file, args.manifest_file)
+    read_done = time.perf_counter()
+    results = write_chair(all_pids, dual_pids, exceptions, reviews, chair_file,
+                          partitions, args.sort, args.top, args.stats_file, pid_results,
+                          clusters, args.cluster_stats_file)
+    write_done = time.perf_counter()
+    if args.delta_file:
+        hashes, counts = write_delta(results, old_hashes, args.delta_file)
+        write_manifest(args.manifest_file, hashes)
+        if verbose:
+            print(f'delta: {counts}')
+    if args.binary_file:
+        chairbin.write_chair_bin(results, args.binary_file)
+    if args.log_file:
+        run, counts = append_to_log(results, args.log_file)
+        if verbose:
+            print(f'log run {run}: {counts}')
+    if conn:
+        store.write_chair_results(conn, results)
+        conn.close()
+    if args.profile:
+        end = time.perf_counter()
+        report_profile([('read', read_done - start),
+                        ('compute and write chair', write_done - read_done),
+                        ('other outputs', end - write_done)])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,206 @@
+import sys
+import csv
+import mmap
+import array
+import struct
+import argparse
+
+'''
+Compact columnar binary version of chair.csv (chair.py --binary chair.bin),
+so an importer can memory-map it and read one column without parsing the rest,
+or the quoted Reviews strings.
+
+Layout (all little-endian, every section starts on an 8-byte boundary):
+
+* header: magic "HCHR", version (u16), number of columns (u16), number of rows (u32)
+* one 56-byte descriptor per column: name (16 bytes, NUL padded), kind (1 byte),
+  7 bytes padding, then data offset, data length, table offset, table length (u64 each)
+* numeric columns (kind 'd' float64, 'b' int8): one value per row at data offset
+* string columns (kind 's'): one u32 per row at data offset, indexing the
+  column's string table; the table is a u32 count, count + 1 u32 byte offsets,
+  then the UTF-8 strings back to back (each distinct string stored once)
+
+Columns: pid (s), sort_score (d), status (b), reviews (s), tags (s), where
+status is coded like Final Recommendation: Reject -1, Tabled 0, Conference 1, Journal 2.
+
+To read a column, or check a binary file against the chair.csv of the same run:
+
+    python chairbin.py data/chair.bin --column sort_score
+    python chairbin.py data/chair.bin --check data/chair.csv
+'''
+
+MAGIC = b'HCHR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+DESCRIPTOR = struct.Struct('<16sc7xQQQQ')
+
+STATUS_CODES = {'Reject': -1, 'Tabled': 0, 'Conference': 1, 'Journal': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# name, kind, index into the result tuple (see chair.write_chair)
+COLUMNS = [
+    ('pid', b's', 0),
+    ('sort_score', b'd', 1),
+    ('status', b'b', 2),
+    ('reviews', b's', 3),
+    ('tags', b's', 4),
+]
+
+def pad8(n):
+    return (n + 7) & ~7
+
+def string_table(values):
+    strings = {}
+    indices = array.array('I')
+    for value in values:
+        if value not in strings:
+            strings[value] = len(strings)
+        indices.append(strings[value])
+    offsets = array.array('I', [0])
+    blob = bytearray()
+    for value in strings:
+        blob += value.encode()
+        offsets.append(len(blob))
+    table = struct.pack('<I', len(strings)) + offsets.tobytes() + bytes(blob)
+    return indices.tobytes(), table
+
+def column_bytes(kind, values):
+    if kind == b'd':
+        return array.array('d', [float(v) for v in values]).tobytes(), b''
+    if kind == b'b':
+        return array.array('b', [STATUS_CODES.get(v, 0) for v in values]).tobytes(), b''
+    return string_table(values)
+
+# results: (Submission ID, Sort Score, Status, Reviews, Tags) tuples
+def write_chair_bin(results, fname):
+    sections = []
+    for name, kind, i in COLUMNS:
+        data, table = column_bytes(kind, [result[i] for result in results])
+        sections.append((name, kind, data, table))
+    offset = pad8(HEADER.size + DESCRIPTOR.size * len(COLUMNS))
+    descriptors = []
+    body = []
+    for name, kind, data, table in sections:
+        data_offset = offset
+        offset = pad8(offset + len(data))
+        table_offset = offset
+        offset = pad8(offset + len(table))
+        descriptors.append(DESCRIPTOR.pack(name.encode(), kind, data_offset, len(data),
+                                           table_offset, len(table)))
+        body.append((data_offset, data))
+        body.append((table_offset, table))
+    with open(fname, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), len(results)))
+        f.write(b''.join(descriptors))
+        for section_offset, data in body:
+            f.write(b'\0' * (section_offset - f.tell()))
+            f.write(data)
+
+class ChairBin:
+    def __init__(self, fname):
+        with open(fname, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, ncols, self.nrows = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{fname} is not a version {VERSION} chair binary file')
+        self.columns = {}
+        for c in range(ncols):
+            name, kind, *offsets = DESCRIPTOR.unpack_from(
+                self.map, HEADER.size + c * DESCRIPTOR.size)
+            self.columns[name.rstrip(b'\0').decode()] = (kind, *offsets)
+
+    def __len__(self):
+        return self.nrows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # numeric columns returned by column() stay valid after close; the file
+    # mapping itself is closed once the last of them is released
+    def close(self):
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            pass # column views still exist; the mmap closes when they are freed
+
+    # numeric columns come back as zero-copy memoryviews over the mapped file
+    def column(self, name):
+        kind, data_offset, data_length, table_offset, table_length = self.columns[name]
+        data = self.view[data_offset:data_offset + data_length]
+        if kind == b'd':
+            return data.cast('d')
+        if kind == b'b':
+            return data.cast('b')
+        strings = self.strings(table_offset)
+        return [strings[i] for i in data.cast('I')]
+
+    def strings(self, table_offset):
+        (count,) = struct.unpack_from('<I', self.map, table_offset)
+        start = table_offset + 4
+        offsets = self.view[start:start + 4 * (count + 1)].cast('I')
+        blob = start + 4 * (count + 1)
+        return [bytes(self.view[blob + offsets[i]:blob + offsets[i + 1]]).decode()
+                for i in range(count)]
+
+    def statuses(self):
+        return [STATUS_NAMES[code] for code in self.column('status')]
+
+    # rows as (Submission ID, Sort Score, Status, Reviews, Tags) tuples
+    def results(self):
+        return list(zip(self.column('pid'), self.column('sort_score'), self.statuses(),
+                        self.column('reviews'), self.column('tags')))
+
+def read_chair_csv(fname):
+    with open(fname, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None) # skip header
+        return [row for row in reader]
+
+# returns a list of differences (empty when equivalent), at most max_diffs;
+# rows are matched by Submission ID, since chair.py --sort reorders the CSV
+def check_against_csv(bin_file, csv_file, max_diffs=10):
+    with ChairBin(bin_file) as chair:
+        results = {result[0]: result for result in chair.results()}
+    rows = read_chair_csv(csv_file)
+    diffs = []
+    if len(rows) != len(results):
+        diffs.append(f'{len(rows)} rows in {csv_file} but {len(results)} in {bin_file}')
+    for row in rows:
+        expected = (row[0], float(row[1]), row[2], row[3], row[4])
+        result = results.get(row[0])
+        if expected != result:
+            diffs.append(f'{row[0]}: csv {expected} vs binary {result}')
+            if len(diffs) >= max_diffs:
+                break
+    return diffs
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('bin', help='chair binary file written by chair.py --binary')
+    parser.add_argument('--column', help='print just this column')
+    parser.add_argument('--check', help='chair CSV to compare against, row by row')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.check:
+        diffs = check_against_csv(args.bin, args.check)
+        for diff in diffs:
+            print(diff)
+        print('binary and CSV differ' if diffs else 'binary and CSV match')
+        sys.exit(1 if diffs else 0)
+    with ChairBin(args.bin) as chair:
+        if args.column:
+            values = chair.statuses() if args.column == 'status' else chair.column(args.column)
+            for value in values:
+                print(value)
+        else:
+            print(f'{len(chair)} rows, columns: {", ".join(chair.columns)}')
+
+if __name__ == "__main__":
+    main()
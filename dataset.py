@@ -0,0 +1,237 @@
+import os
+import csv
+import sys
+import argparse
+
+'''
+Reads all six Linklings-style exports in a data directory once (as written by
+fake.py) into columnar tables, and builds hash indexes over them:
+
+* users.csv: Email,First Name,Last Name,Rooms,Role,Password
+* papers.csv: Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract
+* conflicts.csv: Submission ID,Email
+* clusters.csv: Submission ID,Cluster
+* reviews.csv: Submission ID,Role,Score,Conf/Journal Rec,Expertise,Final Recommendation,Top 10%
+* history.csv: Submission ID,When,Context,Status
+
+Each table stores one list per column (the few distinct values of columns like
+Role, Room and Status are interned, so they share memory; unique strings like
+titles and emails are not). Indexes map keys to row numbers
+or sets, so questions like "reviews for papers in cluster b that user X is not
+conflicted with" are answered by lookups instead of rescanning the files:
+
+    data = load_dataset('data')
+    rows = data.reviews_in_cluster_without_conflict('b', 'fake.chair@example.com')
+    for row in data.reviews.rows(rows):
+        print(row['Submission ID'], row['Score'])
+
+A missing file loads as an empty table.
+'''
+
+TABLE_FILES = {
+    'users': 'users.csv',
+    'papers': 'papers.csv',
+    'conflicts': 'conflicts.csv',
+    'clusters': 'clusters.csv',
+    'reviews': 'reviews.csv',
+    'history': 'history.csv',
+}
+
+# low-cardinality columns, whose values repeat across many rows
+INTERNED_COLUMNS = {'Role', 'Room', 'Area', 'Track', 'Status', 'Context', 'Cluster'}
+
+class Table:
+    def __init__(self, columns):
+        self.columns = columns
+        self.data = {name: [] for name in columns}
+        self.interned = [name in INTERNED_COLUMNS for name in columns]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        # short rows are padded with blanks, extra fields are dropped
+        for i, name in enumerate(self.columns):
+            value = row[i] if i < len(row) else ''
+            self.data[name].append(sys.intern(value) if self.interned[i] else value)
+        self.size += 1
+
+    def column(self, name):
+        return self.data[name]
+
+    def get(self, i, name):
+        return self.data[name][i]
+
+    def row(self, i):
+        return {name: self.data[name][i] for name in self.columns}
+
+    def rows(self, indices):
+        return [self.row(i) for i in indices]
+
+    # indices of rows where a column equals a value (a scan, for unindexed columns)
+    def where(self, name, value):
+        return [i for i, v in enumerate(self.data[name]) if v == value]
+
+def read_table(fname):
+    if not os.path.exists(fname):
+        return Table([])
+    with open(fname, 'r') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        table = Table(header)
+        for row in reader:
+            if row:
+                table.append(row)
+    return table
+
+# key column -> list of row indices
+def index_rows(table, key):
+    index = {}
+    if not len(table):
+        return index
+    for i, k in enumerate(table.column(key)):
+        index.setdefault(k, []).append(i)
+    return index
+
+# key column -> set of values in another column
+def index_sets(table, key, value):
+    index = {}
+    if not len(table):
+        return index
+    for k, v in zip(table.column(key), table.column(value)):
+        index.setdefault(k, set()).add(v)
+    return index
+
+# key column -> row index, for tables with one row per key
+def index_unique(table, key):
+    if not len(table):
+        return {}
+    return {k: i for i, k in enumerate(table.column(key))}
+
+# key column -> list of values in another column
+def index_rows_to_values(table, key, value):
+    index = {}
+    if not len(table):
+        return index
+    for k, v in zip(table.column(key), table.column(value)):
+        index.setdefault(k, []).append(v)
+    return index
+
+# key column -> value in another column, last one wins
+def index_values(table, key, value):
+    if not len(table):
+        return {}
+    return dict(zip(table.column(key), table.column(value)))
+
+class Dataset:
+    def __init__(self, tables):
+        self.tables = tables
+        self.users = tables['users']
+        self.papers = tables['papers']
+        self.conflicts = tables['conflicts']
+        self.clusters = tables['clusters']
+        self.reviews = tables['reviews']
+        self.history = tables['history']
+        # indexes
+        self.paper_by_pid = index_unique(self.papers, 'Submission ID')
+        self.user_by_email = index_unique(self.users, 'Email')
+        self.reviews_by_pid = index_rows(self.reviews, 'Submission ID')
+        self.history_by_pid = index_rows(self.history, 'Submission ID')
+        self.pids_by_email = index_sets(self.conflicts, 'Email', 'Submission ID')
+        self.emails_by_pid = index_sets(self.conflicts, 'Submission ID', 'Email')
+        self.pids_by_cluster = index_rows_to_values(self.clusters, 'Cluster', 'Submission ID')
+        self.cluster_by_pid = index_values(self.clusters, 'Submission ID', 'Cluster')
+        self.pids_by_room = index_rows_to_values(self.papers, 'Room', 'Submission ID')
+
+    # single lookups, O(1) plus the size of the answer
+
+    def paper(self, pid):
+        i = self.paper_by_pid.get(pid)
+        return None if i is None else self.papers.row(i)
+
+    def user(self, email):
+        i = self.user_by_email.get(email)
+        return None if i is None else self.users.row(i)
+
+    def review_rows(self, pid):
+        return self.reviews_by_pid.get(pid, [])
+
+    def history_rows(self, pid):
+        return self.history_by_pid.get(pid, [])
+
+    def conflicted_pids(self, email):
+        return self.pids_by_email.get(email, set())
+
+    def conflicted_emails(self, pid):
+        return self.emails_by_pid.get(pid, set())
+
+    def is_conflicted(self, email, pid):
+        return pid in self.conflicted_pids(email)
+
+    def cluster_pids(self, cluster):
+        return self.pids_by_cluster.get(cluster, [])
+
+    def cluster(self, pid):
+        return self.cluster_by_pid.get(pid, '')
+
+    def room_pids(self, room):
+        return self.pids_by_room.get(room, [])
+
+    # joins and filters
+
+    # pids from the given list (default: all papers) that pass an optional test
+    def filter_pids(self, pids=None, test=None, exclude_conflicts_of=None):
+        if pids is None:
+            pids = self.papers.column('Submission ID') if len(self.papers) else []
+        conflicted = set()
+        if exclude_conflicts_of:
+            conflicted = self.conflicted_pids(exclude_conflicts_of)
+        return [pid for pid in pids
+                if pid not in conflicted and (test is None or test(pid))]
+
+    # review row indices for the given pids, in pid order
+    def review_rows_for(self, pids):
+        rows = []
+        for pid in pids:
+            rows += self.review_rows(pid)
+        return rows
+
+    def reviews_in_cluster_without_conflict(self, cluster, email):
+        pids = self.filter_pids(self.cluster_pids(cluster), exclude_conflicts_of=email)
+        return self.review_rows_for(pids)
+
+def load_dataset(data_dir):
+    tables = {}
+    for name, fname in TABLE_FILES.items():
+        tables[name] = read_table(f'{data_dir}/{fname}')
+    return Dataset(tables)
+
+def report_dataset(data):
+    for name, table in data.tables.items():
+        print(f'{name} has {len(table)} rows: {", ".join(table.columns)}')
+    print(f'{len(data.pids_by_cluster)} clusters, '
+          f'{len(data.pids_by_email)} conflicted users, '
+          f'{len(data.reviews_by_pid)} reviewed papers')
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dir', default='data',
+                        help='directory of input CSVs')
+    parser.add_argument('--cluster',
+                        help='list reviews for papers in this cluster')
+    parser.add_argument('--email',
+                        help='with --cluster, skip papers this user is conflicted with')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    data = load_dataset(args.dir)
+    report_dataset(data)
+    if args.cluster:
+        rows = data.reviews_in_cluster_without_conflict(args.cluster, args.email)
+        for row in data.reviews.rows(rows):
+            print(','.join(row.values()))
+
+if __name__ == "__main__":
+    main()
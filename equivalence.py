@@ -0,0 +1,296 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import chair
+import store
+import batch
+
+'''
+Checks that the alternative ways of computing chair.csv give the same rows
+as the reference path (read_papers -> read_reviews -> write_chair), on
+randomized data from fake.py at one or more scales, and how fast and how
+memory-hungry each one is:
+
+    python equivalence.py --num_papers 1000 10000 --lite
+    python equivalence.py --num_papers 5000 --scenario scenarios/heavy_tail.json --keep
+
+Engines (see ENGINES):
+* spill: reviews spilled to disk and computed per partition (--memory-budget)
+* rows: inputs parsed from rows in memory (the URL path)
+* db: inputs upserted into and read back from SQLite (--db)
+* partition: per room/area files written in the same pass (--partition)
+* sort: every file sorted by Sort Score (--sort), so rows are matched by pid
+* warm_cache: the reference path with the fragment caches already filled
+* batch: the batch.py worker, in a process pool
+
+Each engine writes its own chair.csv, which is compared row by row with the
+reference one; the first few divergences are printed. Seconds are the best of
+--repeat runs (fragment caches are cleared before each, except for
+warm_cache); speedup is the reference time over the engine's. Peak memory is
+what tracemalloc saw in this process during a separate run, so batch's worker
+processes aren't counted. Exits with status 1 if any engine diverged.
+
+Dataset i at each scale is generated with fake.py --seed (--seed + i), so a
+divergence can be reproduced with the same options (and --keep to look at it).
+'''
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SPILL_PARTITIONS = 8
+REPORT_HEADER = 'Papers,Dataset,Engine,Rows,Diffs,Seconds,Speedup,Peak MB\n'
+
+class Engine:
+    def __init__(self, name, run, ordered=True, warm=False):
+        self.name = name
+        self.run = run # (data_dir, out_dir) -> chair file written
+        self.ordered = ordered # False: rows are matched by Submission ID
+        self.warm = warm # True: caches are filled by an untimed run first
+
+def input_files(data_dir):
+    return f'{data_dir}/papers.csv', f'{data_dir}/reviews.csv'
+
+def run_reference(data_dir, out_dir, **options):
+    papers_file, reviews_file = input_files(data_dir)
+    chair_file = f'{out_dir}/chair.csv'
+    all_pids, dual_pids, exceptions, rooms, areas = chair.read_papers(papers_file)
+    reviews = chair.read_reviews(all_pids, reviews_file)
+    partitions = [rooms, areas] if options.get('partition') else []
+    chair.write_chair(all_pids, dual_pids, exceptions, reviews, chair_file,
+                      partitions, options.get('sort', False))
+    return chair_file
+
+def run_spill(data_dir, out_dir):
+    papers_file, reviews_file = input_files(data_dir)
+    chair_file = f'{out_dir}/chair.csv'
+    all_pids, dual_pids, exceptions, rooms, areas = chair.read_papers(papers_file)
+    pid_results, reviews = chair.compute_results_spilled(
+        all_pids, dual_pids, exceptions, reviews_file, SPILL_PARTITIONS)
+    chair.write_chair(all_pids, dual_pids, exceptions, reviews, chair_file,
+                      pid_results=pid_results)
+    return chair_file
+
+def run_rows(data_dir, out_dir):
+    chair_file = f'{out_dir}/chair.csv'
+    papers_rows, reviews_rows = chair.read_input_rows(input_files(data_dir), out_dir)
+    all_pids, dual_pids, exceptions, rooms, areas = chair.papers_from_rows(papers_rows)
+    reviews = chair.reviews_from_rows(all_pids, reviews_rows)
+    chair.write_chair(all_pids, dual_pids, exceptions, reviews, chair_file)
+    return chair_file
+
+def run_db(data_dir, out_dir):
+    papers_file, reviews_file = input_files(data_dir)
+    chair_file = f'{out_dir}/chair.csv'
+    db_file = f'{out_dir}/chair.db'
+    if os.path.exists(db_file):
+        os.remove(db_file) # every run ingests from scratch
+    conn = store.connect(db_file)
+    all_pids, dual_pids, exceptions, rooms, areas, reviews = chair.read_inputs_from_db(
+        conn, papers_file, reviews_file, False, out_dir)
+    results = chair.write_chair(all_pids, dual_pids, exceptions, reviews, chair_file)
+    store.write_chair_results(conn, results)
+    conn.close()
+    return chair_file
+
+def run_partition(data_dir, out_dir):
+    return run_reference(data_dir, out_dir, partition=True)
+
+def run_sort(data_dir, out_dir):
+    return run_reference(data_dir, out_dir, sort=True)
+
+def run_batch(data_dir, out_dir):
+    for fname in input_files(data_dir):
+        shutil.copy(fname, out_dir)
+    summaries = batch.run_batch([out_dir], 'papers.csv', 'reviews.csv', 'chair.csv',
+                                False, workers=1)
+    if not summaries:
+        raise RuntimeError(f'batch failed on {out_dir}')
+    return f'{out_dir}/chair.csv'
+
+ENGINES = [
+    Engine('spill', run_spill),
+    Engine('rows', run_rows),
+    Engine('db', run_db),
+    Engine('partition', run_partition),
+    Engine('sort', run_sort, ordered=False),
+    Engine('warm_cache', run_reference, warm=True),
+    Engine('batch', run_batch),
+]
+
+def clear_caches():
+    chair.format_score_list.cache_clear()
+    chair.format_conf_jour_list.cache_clear()
+
+def generate_dataset(data_dir, args, num_papers, seed):
+    command = [sys.executable, f'{HERE}/fake.py', '--dir', data_dir, '--seed', str(seed),
+               '--num_users', str(args.num_users), '--num_papers', str(num_papers)]
+    if args.lite:
+        command.append('--lite')
+    if args.scenario:
+        command += ['--scenario', args.scenario]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+def read_lines(chair_file):
+    with open(chair_file, 'r') as f:
+        next(f, None) # skip header
+        return list(f)
+
+def pid_of(line):
+    return line.split(',', 1)[0]
+
+# up to max_diffs (description, reference line, engine line) tuples, and the total
+def diff_lines(expected, actual, ordered, max_diffs):
+    diffs = []
+    count = 0
+    if ordered:
+        pairs = [(f'row {i + 1}', e, a) for i, (e, a) in enumerate(zip(expected, actual))
+                 if e != a]
+    else:
+        by_pid = {pid_of(line): line for line in actual}
+        pairs = [(pid_of(e), e, by_pid.get(pid_of(e), '')) for e in expected
+                 if by_pid.get(pid_of(e)) != e]
+    if len(expected) != len(actual):
+        pairs.append((f'{len(expected)} rows vs {len(actual)}', '', ''))
+    for pair in pairs:
+        count += 1
+        if len(diffs) < max_diffs:
+            diffs.append(pair)
+    return diffs, count
+
+# best seconds over repeat runs, then the tracemalloc peak of one more run
+def measure(engine, data_dir, out_dir, repeat):
+    if engine.warm:
+        engine.run(data_dir, out_dir)
+    times = []
+    for _ in range(repeat):
+        if not engine.warm:
+            clear_caches()
+        start = time.perf_counter()
+        engine.run(data_dir, out_dir)
+        times.append(time.perf_counter() - start)
+    if not engine.warm:
+        clear_caches()
+    tracemalloc.start()
+    chair_file = engine.run(data_dir, out_dir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chair_file, min(times), peak
+
+def check_dataset(data_dir, engines, args):
+    reference = Engine('reference', run_reference)
+    out_dir = f'{data_dir}/out_reference'
+    os.makedirs(out_dir, exist_ok=True)
+    chair_file, ref_seconds, peak = measure(reference, data_dir, out_dir, args.repeat)
+    expected = read_lines(chair_file)
+    rows = [('reference', len(expected), 0, ref_seconds, 1.0, peak)]
+    for engine in engines:
+        out_dir = f'{data_dir}/out_{engine.name}'
+        os.makedirs(out_dir, exist_ok=True)
+        chair_file, seconds, peak = measure(engine, data_dir, out_dir, args.repeat)
+        actual = read_lines(chair_file)
+        diffs, count = diff_lines(expected, actual, engine.ordered, args.max_diffs)
+        for where, e, a in diffs:
+            print(f'  {engine.name} diverges at {where}:')
+            if e or a:
+                print(f'    reference: {e.rstrip()}')
+                print(f'    {engine.name}: {a.rstrip()}')
+        rows.append((engine.name, len(actual), count, seconds, ref_seconds / seconds, peak))
+    return rows
+
+def format_report_row(num_papers, dataset, row):
+    name, num_rows, diffs, seconds, speedup, peak = row
+    fields = [num_papers, dataset, name, num_rows, diffs, round(seconds, 4),
+              round(speedup, 2), round(peak / (1 << 20), 2)]
+    return ','.join(str(field) for field in fields) + '\n'
+
+def print_rows(rows):
+    print(f'  {"engine":<12} {"rows":>8} {"diffs":>6} {"seconds":>9} {"speedup":>8} {"peak MB":>8}')
+    for name, num_rows, diffs, seconds, speedup, peak in rows:
+        print(f'  {name:<12} {num_rows:>8} {diffs:>6} {seconds:>9.4f} '
+              f'{speedup:>7.2f}x {peak / (1 << 20):>8.2f}')
+
+# peak RSS of this process, or None where the resource module is missing (Windows)
+def max_resident_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux
+    return maxrss / (1 << 20) if sys.platform == 'darwin' else maxrss / 1024
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--num_papers', type=int, nargs='+', default=[1000],
+                        help='scales to check, in papers per dataset')
+    parser.add_argument('--num_users', type=int, default=200,
+                        help='users per dataset')
+    parser.add_argument('--datasets', type=int, default=1,
+                        help='datasets per scale')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the first dataset')
+    parser.add_argument('--lite', action='store_true',
+                        help='generate with fake.py --lite (no numpy or Faker needed)')
+    parser.add_argument('--scenario', default='',
+                        help='fake.py stress-scenario profile (its num_papers, if set, overrides the scales)')
+    parser.add_argument('--engines', nargs='+', default=[engine.name for engine in ENGINES],
+                        help='engines to check against the reference')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per engine (the best is kept)')
+    parser.add_argument('--max_diffs', type=int, default=5,
+                        help='divergences printed per engine')
+    parser.add_argument('--report', # no default
+                        help='filename of optional output CSV of all measurements')
+    parser.add_argument('--dir', # no default
+                        help='directory for datasets, kept after (default: a temp dir)')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the temp dir of generated datasets')
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+    names = {engine.name for engine in ENGINES}
+    for name in args.engines:
+        if name not in names:
+            parser.error(f'unknown engine {name}, choose from {", ".join(sorted(names))}')
+    return args
+
+def main():
+    args = parse_args()
+    engines = [engine for engine in ENGINES if engine.name in args.engines]
+    base_dir = args.dir or tempfile.mkdtemp(prefix='equivalence_')
+    report = [REPORT_HEADER]
+    diverged = False
+    try:
+        for num_papers in args.num_papers:
+            for i in range(args.datasets):
+                seed = args.seed + i
+                data_dir = f'{base_dir}/papers{num_papers}_seed{seed}'
+                start = time.perf_counter()
+                generate_dataset(data_dir, args, num_papers, seed)
+                seconds = round(time.perf_counter() - start, 2)
+                rows = check_dataset(data_dir, engines, args)
+                # a --scenario's num_papers overrides the scale, so label by what was generated
+                papers = rows[0][1]
+                print(f'{papers} papers, seed {seed} (generated in {seconds}s):')
+                print_rows(rows)
+                diverged = diverged or any(row[2] for row in rows)
+                report += [format_report_row(papers, seed, row) for row in rows]
+    finally:
+        if args.dir or args.keep:
+            print(f'datasets in {base_dir}')
+        else:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.writelines(report)
+    maxrss = max_resident_mb()
+    if maxrss is not None:
+        print(f'max resident memory of this process: {maxrss:.1f} MB')
+    print('all engines match the reference' if not diverged else 'engines diverged')
+    sys.exit(1 if diverged else 0)
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,109 @@ import os
 import math
 # import statistics
 import random
+import time
 import argparse
-import numpy as np
-from faker import Faker
+import calendar
+# numpy, faker and store are imported only when needed (see --lite)
 # from datetime import datetime, timedelta
 
 # globals
-FAKER = Faker()
+LITE = False  # global, set by --lite: stdlib and bundled word lists only
+FAKER = None  # global, created on first use by faker()
+NUMPY = None  # global, imported on first use by numpy()
+SEED = None  # global, set by --seed
 DATA_DIR = None  # global, set by command line option (default "data")
+DB_CONN = None  # global, SQLite connection when --db is given
+
+# stress-scenario knobs, overridden by a JSON profile (--scenario);
+# these defaults reproduce the usual data
+DEFAULT_SCENARIO = {
+    "num_users": None,  # overrides --num_users (e.g. a huge committee)
+    "num_papers": None,  # overrides --num_papers
+    "review_count_min": 5,
+    "review_count_max": 6,
+    "review_count_tail": 0,  # Pareto alpha for heavy-tailed counts, 0 = uniform min..max
+    "missing_review_fraction": 0.0,  # papers with no reviews at all
+    "exception_fraction": 0.0,  # papers with an exception, besides the first (Withdrawn)
+    "exception_options": ["Withdrawn", "Desk Reject", "Duplicate"],
+    "shuffle_reviews": False,  # reviews.csv rows in random order, not grouped by paper
+    "abstract_sentences": 12,
+    "conflicts_mean": 3,
+}
+SCENARIO = dict(DEFAULT_SCENARIO)
+
+
+def is_count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# list of problems with a scenario's settings (empty if it is usable)
+def scenario_problems(scenario):
+    problems = []
+    for key in ["num_users", "num_papers"]:
+        if scenario[key] is not None and not is_count(scenario[key]):
+            problems.append(f"{key} must be null or a whole number >= 0")
+    for key in ["review_count_min", "review_count_max", "abstract_sentences"]:
+        if not is_count(scenario[key]):
+            problems.append(f"{key} must be a whole number >= 0")
+    if (is_count(scenario["review_count_min"]) and is_count(scenario["review_count_max"])
+            and scenario["review_count_min"] > scenario["review_count_max"]):
+        problems.append("review_count_min must not be more than review_count_max")
+    for key in ["review_count_tail", "conflicts_mean"]:
+        if not is_number(scenario[key]) or scenario[key] < 0:
+            problems.append(f"{key} must be a number >= 0")
+    for key in ["missing_review_fraction", "exception_fraction"]:
+        if not is_number(scenario[key]) or not 0 <= scenario[key] <= 1:
+            problems.append(f"{key} must be a number from 0 to 1")
+    options = scenario["exception_options"]
+    if (not isinstance(options, list) or not options
+            or not all(isinstance(o, str) and o for o in options)):
+        problems.append("exception_options must be a non-empty list of strings")
+    if not isinstance(scenario["shuffle_reviews"], bool):
+        problems.append("shuffle_reviews must be true or false")
+    return problems
+
+
+def load_scenario(path):
+    import json
+    with open(path, "r") as f:
+        profile = json.load(f)
+    unknown = set(profile) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"unknown scenario settings in {path}: {', '.join(sorted(unknown))}")
+    scenario = dict(SCENARIO, **profile)
+    problems = scenario_problems(scenario)
+    if problems:
+        raise ValueError(f"bad scenario settings in {path}: {'; '.join(problems)}")
+    SCENARIO.update(profile)
+
+
+def faker():
+    global FAKER
+    if FAKER is None:
+        if LITE:
+            import lite_words
+            FAKER = lite_words.LiteFaker()
+        else:
+            from faker import Faker
+            if SEED is not None:
+                Faker.seed(SEED)
+            FAKER = Faker()
+    return FAKER
+
+
+def numpy():
+    global NUMPY
+    if NUMPY is None:
+        import numpy as np
+        if SEED is not None:
+            np.random.seed(SEED)
+        NUMPY = np
+    return NUMPY
 
 
 def setup_data_dir(dir):
@@ -35,6 +130,12 @@ def write_file(fname, contents):
     path = f"{DATA_DIR}/{fname}"
     with open(path, "w") as f:
         f.write(contents)
+    if not DB_CONN:
+        return
+    import store
+    if fname in store.CSV_TABLES:
+        table = store.CSV_TABLES[fname]
+        store.ingest_rows(DB_CONN, table, store.csv_text_rows(contents))
 
 
 def line_to_email(line):
@@ -96,14 +197,15 @@ def rand_person_rooms():
 
 
 # users: Email,First Name,Last Name,Rooms,Role,Password
-def fake_person(role=None, first=None, last=None):
+def fake_person(role=None, first=None, last=None, email=None):
     if not first:
-        first = FAKER.first_name()
+        first = faker().first_name()
     if not last:
-        last = FAKER.last_name()
+        last = faker().last_name()
     if not role:
         role = ""  # formerly: random_role()
-    email = name_to_email(first, last)
+    if not email:
+        email = name_to_email(first, last)
     rooms = rand_person_rooms()
     passwd = "" # no longer set here
     result = f"{email},{first},{last},{rooms},{role},{passwd}\n"
@@ -113,22 +215,33 @@ def fake_person(role=None, first=None, last=None):
 # users: Email,First Name,Last Name,Rooms,Role,Password
 def fake_users(n, fname):
     emails = []
-    people = "Email,First Name,Last Name,Rooms,Role,Password\n"
+    seen = set()
+    people = ["Email,First Name,Last Name,Rooms,Role,Password\n"]
     person, _ = fake_person("Admin", "Fake", "Admin")
-    people += person
+    people.append(person)
     person, email = fake_person("Chair", "Fake", "Chair")
-    people += person
+    people.append(person)
     emails.append(email)
     person, email = fake_person(None, "Fake", "Citizen")
-    people += person
+    people.append(person)
     emails.append(email)
+    seen.update(emails)
+    repeats = {}  # email -> times its name came up again
     while len(emails) < n:
-        person, email = fake_person()
-        if email in emails:
-            continue # avoid duplicates
-        people += person
+        first = faker().first_name()
+        last = faker().last_name()
+        email = name_to_email(first, last)
+        # a repeated name gets a numeric suffix (jane.doe2@example.com), so the
+        # loop ends even when n exceeds the distinct names (e.g. with --lite)
+        base = email
+        while email in seen:
+            repeats[base] = repeats.get(base, 1) + 1
+            email = name_to_email(first, f"{last}{repeats[base]}")
+        person, email = fake_person(None, first, last, email)
+        people.append(person)
         emails.append(email)
-    write_file(fname, people)
+        seen.add(email)
+    write_file(fname, "".join(people))
     return emails
 
 
@@ -171,8 +284,8 @@ def fake_paper(pid):
     n = pid.replace("papers_", "")
     # like this: https://fakeimg.pl/600x450/a42/fa8/?text=255&font_size=240&font=bebas
     url = f"https://fakeimg.pl/600x450/{c1}/{c2}/?text={n}&font_size=240&font=bebas"
-    title = csv_safe_string(FAKER.sentence(nb_words=7))
-    abstract = csv_safe_string(FAKER.paragraph(nb_sentences=12))
+    title = csv_safe_string(faker().sentence(nb_words=7))
+    abstract = csv_safe_string(faker().paragraph(nb_sentences=SCENARIO["abstract_sentences"]))
     title = title[:-1]  # remove trailing period
     title = title.title()  # each word caps
     area = fake_area()
@@ -187,7 +300,7 @@ def fake_papers(n, fname):
     paper_rooms = {}
     dual_pids = []
     pids = []
-    papers = "Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract\n"
+    papers = ["Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract\n"]
     start = 101
     for i in range(start, start + n):
         pid = f"papers_{i}"
@@ -195,45 +308,67 @@ def fake_papers(n, fname):
         paper_rooms[pid] = room
         if i == start:
             paper_line = paper_line.replace(",,http", ",Withdrawn,http")
-        papers += paper_line
+        elif random.random() < SCENARIO["exception_fraction"]:
+            exception = random.choice(SCENARIO["exception_options"])
+            paper_line = paper_line.replace(",,http", f",{exception},http")
+        papers.append(paper_line)
         pids.append(pid)
         if track == "Dual Track":
             dual_pids.append(pid)
-    write_file(fname, papers)
+    write_file(fname, "".join(papers))
     return pids, dual_pids, paper_rooms
 
 
+# stdlib Poisson draw: Knuth's method, or a rounded normal for large means
+def poisson(lam):
+    if lam >= 30:
+        return max(0, round(random.gauss(lam, math.sqrt(lam))))
+    limit = math.exp(-lam)
+    k = 0
+    p = random.random()
+    while p > limit:
+        k += 1
+        p *= random.random()
+    return k
+
+
 def rand_num_conflicts():
-    n = math.floor(np.random.poisson(3))
+    if LITE:
+        return poisson(SCENARIO["conflicts_mean"])
+    n = math.floor(numpy().random.poisson(SCENARIO["conflicts_mean"]))
     return n
 
 
+# O(n) per paper, not O(committee size)
 def rand_conflicts(emails, n):
-    ems = emails.copy()
-    random.shuffle(ems)
-    ems = ems[:n]
-    return ems
+    return random.sample(emails, min(n, len(emails)))
 
 
 # conflicts: Submission ID,Email
 def fake_conflicts(emails, papers, fname):
-    conflicts = "Submission ID,Email\n"
+    conflicts = ["Submission ID,Email\n"]
     for pid in papers:
         n = rand_num_conflicts()
         conf = rand_conflicts(emails, n)
         for c in conf:
-            conflicts += f"{pid},{c}\n"
-    write_file(fname, conflicts)
+            conflicts.append(f"{pid},{c}\n")
+    write_file(fname, "".join(conflicts))
 
 
 def gaussian_noise(mu, sigma):
-    return np.random.normal(mu, sigma)
+    if LITE:
+        return random.gauss(mu, sigma)
+    return numpy().random.normal(mu, sigma)
 
 def eval_gaussian(x, mu, sig):
+    if LITE:
+        return math.exp(-((x - mu) ** 2.0) / (2 * sig ** 2.0))
+    np = numpy()
     return np.exp(-np.power(x - mu, 2.0) / (2 * np.power(sig, 2.0)))
 
 
 def dumpOptions(weights, revs):
+    np = numpy()
     w = np.array(weights)
     w *= 100.0 / sum(weights)
     w = np.around(w)
@@ -286,19 +421,34 @@ def fmt_review(pid, role, score, conf_jour, exp, rec, top):
     return line
 
 
-def fake_paper_reviews(pid, is_dual):
+# uniform from min to max, or with a tail, low * Pareto(alpha) truncated
+# to at most max (drawn by inverting the truncated CDF, so the tail is spread
+# over the range instead of piling up at exactly max)
+def rand_num_reviews():
+    low = SCENARIO["review_count_min"]
+    high = SCENARIO["review_count_max"]
+    alpha = SCENARIO["review_count_tail"]
+    if not alpha:
+        return random.randint(low, high)
+    if not low:
+        return 0
+    cut = 1 - (low / (high + 1)) ** alpha  # P(low * Pareto < high + 1)
+    x = (1 - random.random() * cut) ** (-1 / alpha)
+    return min(int(low * x), high)  # min only guards against rounding
+
+
+def fake_paper_reviews(pid, is_dual, num_revs):
     pri = "Technical Papers Committee Member (lead)"
     sec = "Technical Papers Committee Member"
     ter = "Technical Papers Tertiary Reviewer"
     ext = "Technical Papers PC Extra Reviewer"
-    num_revs = random.choice([5,6])
-    roles = [pri, sec, ter, ter, ter]
-    if num_revs == 6:
+    roles = [pri, sec, ter, ter, ter][:num_revs]
+    while len(roles) < num_revs:
         roles.append(random.choice([ter, ext]))
     all_scores = rand_reviews(num_revs)
     rec_num = revs_to_rec_num(all_scores)
     rec_string = rec_num_to_rec(rec_num)
-    result = ""
+    result = []
     for i in range(num_revs):
         pri_sec_rec = rec_num if i < 2 else ""
         if is_dual:
@@ -311,22 +461,32 @@ def fake_paper_reviews(pid, is_dual):
         top = 0
         if pri_sec_rec == 2 and random.randint(0, 1) == 0:
             top = 1
-        result += fmt_review(pid, role, score, conf_jour, exp, pri_sec_rec, top)
+        result.append(fmt_review(pid, role, score, conf_jour, exp, pri_sec_rec, top))
     return result, rec_string, all_scores
 
 
 # 2025: Submission ID,Role,Score,Conf/Journal Rec,Expertise,Final Recommendation,Top 10%
 def fake_reviews(papers, dual_ids, fname):
-    output = "Submission ID,Role,Score,Conf/Journal Rec,Expertise,Final Recommendation,Top 10%\n"
+    header = "Submission ID,Role,Score,Conf/Journal Rec,Expertise,Final Recommendation,Top 10%\n"
+    output = []
     recs = {}
     all_revs = {}
+    dual_ids = set(dual_ids)
     for pid in papers:
+        num_revs = 0
+        if random.random() >= SCENARIO["missing_review_fraction"]:
+            num_revs = rand_num_reviews()
+        if not num_revs:
+            recs[pid] = "Tabled"  # no reviews yet
+            continue
         is_dual = pid in dual_ids
-        lines, rec, revs = fake_paper_reviews(pid, is_dual)
+        lines, rec, revs = fake_paper_reviews(pid, is_dual, num_revs)
         output += lines
         recs[pid] = rec
         all_revs[pid] = revs
-    write_file(fname, output)
+    if SCENARIO["shuffle_reviews"]:
+        random.shuffle(output)
+    write_file(fname, header + "".join(output))
     return recs, all_revs
 
 
@@ -341,7 +501,7 @@ def all_revs_to_list(all_revs):
 def fake_summaries(papers, fname):
     output = "Submission ID,Committee Notes\n"
     for pid in papers:
-        summary = csv_safe_string(FAKER.sentence(nb_words=12))
+        summary = csv_safe_string(faker().sentence(nb_words=12))
         line = f"{pid},{summary}\n"
         output += line
     write_file(fname, output)
@@ -407,8 +567,100 @@ def fake_history(paper_rooms, recs, fname):
     write_file(fname, output)
 
 
+# relative arrival rates of history events per context: each room discusses
+# papers in parallel, a few get stickied, and fewer still reach the plenary
+context_rates = {"Room": 1.0, "Sticky": 0.3, "Plenary": 0.15}
+meeting_hours = (9, 18)  # each day's session, local clock
+history_chunk_lines = 10000
+
+
+def day_start_seconds(start_date, day, hour):
+    base = calendar.timegm(time.strptime(start_date, "%Y-%m-%d"))
+    return base + day * 86400 + hour * 3600
+
+
+def format_when(seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+# each room works through its own papers in a shuffled order, round after round
+def room_paper_cursors(paper_rooms):
+    rooms = {}
+    for pid, room in paper_rooms.items():
+        rooms.setdefault(f"Room_{room}", []).append(pid)
+    cursors = {}
+    for room, pids in rooms.items():
+        random.shuffle(pids)
+        cursors[room] = [pids, 0]
+    return cursors
+
+
+def next_room_paper(cursor):
+    pids, i = cursor
+    if i == len(pids):
+        random.shuffle(pids)  # next round, new order
+        i = 0
+    cursor[1] = i + 1
+    return pids[i]
+
+
+# lazily yields (pid, when, context, status) for n events spread over the
+# meeting days, as a Poisson process per context; timestamps never go back,
+# and each event may flip the paper's current status. The times are a Poisson
+# process conditioned on exactly n events in the sessions, i.e. n sorted
+# uniform times, drawn in order, so none spill past the last session
+def simulate_history_events(paper_rooms, recs, n, days, start_date):
+    cursors = room_paper_cursors(paper_rooms)
+    contexts = list(cursors) + ["Sticky", "Plenary"]
+    weights = [context_rates["Room"]] * len(cursors)
+    weights += [context_rates["Sticky"], context_rates["Plenary"]]
+    all_pids = list(recs)
+    if not all_pids:
+        return
+    status = dict(recs)
+    first_hour, last_hour = meeting_hours
+    session_seconds = (last_hour - first_hour) * 3600
+    total_seconds = days * session_seconds
+    first_start = day_start_seconds(start_date, 0, first_hour)
+    fraction = 0.0  # of the whole meeting's session time, so far
+    when_seconds = None
+    when = ""
+    for i in range(n):
+        # next of the remaining n - i sorted uniforms on [fraction, 1]
+        fraction = 1 - (1 - fraction) * random.random() ** (1 / (n - i))
+        seconds = fraction * total_seconds
+        day = min(int(seconds // session_seconds), days - 1)
+        now = first_start + day * 86400 + seconds - day * session_seconds
+        context = random.choices(contexts, weights)[0]
+        if context in cursors:
+            pid = next_room_paper(cursors[context])
+        else:
+            pid = random.choice(all_pids)
+        status[pid] = possibly_flip_status(status[pid])
+        if int(now) != when_seconds:
+            when_seconds = int(now)
+            when = format_when(when_seconds)
+        yield pid, when, context, status[pid]
+
+
+# history: Submission ID,When,Context,Status
+# streams events to the file in chunks, so n can be in the millions
+def simulate_history(paper_rooms, recs, fname, n, days, start_date):
+    path = f"{DATA_DIR}/{fname}"
+    with open(path, "w") as f:
+        f.write("Submission ID,When,Context,Status\n")
+        chunk = []
+        events = simulate_history_events(paper_rooms, recs, n, days, start_date)
+        for pid, when, context, status in events:
+            chunk.append(f"{pid},{when},{context},{status}\n")
+            if len(chunk) >= history_chunk_lines:
+                f.write("".join(chunk))
+                chunk = []
+        f.write("".join(chunk))
+
+
 def parse_args():
-    global VERBOSE, DATA_DIR
+    global VERBOSE, DATA_DIR, DB_CONN, LITE, SEED
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('--verbose', action='store_true')
     parser.add_argument('--dir', default='data',
@@ -419,17 +671,45 @@ def parse_args():
                         help='filename of output users CSV')
     parser.add_argument('--num_papers', type=int, default=200,
                         help='filename of output users CSV')
+    parser.add_argument('--db', default='',
+                        help='SQLite file (in dir) to also write papers and reviews into (optional)')
+    parser.add_argument('--lite', action='store_true',
+                        help='fast startup: no numpy or Faker, stdlib random and bundled word lists')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='random seed, for reproducible data (optional)')
+    parser.add_argument('--scenario', default='',
+                        help='JSON stress-scenario profile, e.g. scenarios/heavy_tail.json (optional)')
+    parser.add_argument('--history_events', type=int, default=0,
+                        help='simulate this many meeting history events (0: one small snapshot)')
+    parser.add_argument('--meeting_days', type=int, default=3,
+                        help='with --history_events, length of the meeting in days')
+    parser.add_argument('--meeting_start', default='2025-01-01',
+                        help='with --history_events, first day of the meeting')
     args = parser.parse_args()
+    if args.meeting_days < 1:
+        parser.error('--meeting_days must be at least 1')
 
     VERBOSE = args.verbose
     DATA_DIR = args.dir
+    LITE = args.lite
+    SEED = args.seed
+    if SEED is not None:
+        random.seed(SEED)
     users_file = args.users
     if users_file:
         users_file = f'{DATA_DIR}/{args.users}'
-    return users_file, args.num_users, args.num_papers
+    if args.scenario:
+        load_scenario(args.scenario)
+        args.num_users = SCENARIO["num_users"] or args.num_users
+        args.num_papers = SCENARIO["num_papers"] or args.num_papers
+    if args.db:
+        import store
+        setup_data_dir(DATA_DIR)
+        DB_CONN = store.connect(f'{DATA_DIR}/{args.db}')
+    return users_file, args.num_users, args.num_papers, args
 
 def main():
-    users_file, n_users, n_papers = parse_args()
+    users_file, n_users, n_papers, args = parse_args()
     setup_data_dir(DATA_DIR)
     if users_file:
         emails = read_and_copy_users_file(users_file, "users.csv")
@@ -443,7 +723,11 @@ def main():
     fake_conflicts(emails, papers, "conflicts.csv")
     recs, _ = fake_reviews(papers, dual_pids, "reviews.csv")
     fake_clusters(papers, "clusters.csv")
-    fake_history(paper_rooms, recs, "history.csv")
+    if args.history_events:
+        simulate_history(paper_rooms, recs, "history.csv", args.history_events,
+                         args.meeting_days, args.meeting_start)
+    else:
+        fake_history(paper_rooms, recs, "history.csv")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+import io
+import os
+import csv
+import json
+import hashlib
+import threading
+import http.client
+from urllib.parse import urlsplit, urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+Fetches CSV exports over HTTP(S) for chair.py, when --papers or --reviews is a URL.
+
+* URLs are fetched concurrently, sharing a small pool of keep-alive
+  connections per host.
+* Each response body is parsed by csv.reader while it streams in, rather than
+  being buffered into one big string first.
+* Parsed rows are cached in cache_dir as a local CSV, together with the ETag /
+  Last-Modified headers (JSON). The next fetch sends If-None-Match /
+  If-Modified-Since, and on "304 Not Modified" the rows are read back from the
+  local CSV instead of being downloaded again. The cache holds plain text only,
+  so a cache directory others can write to can't run code (unlike pickle).
+
+Only the standard library is used. Any HTTP server works as a stand-in for
+Linklings, e.g. (it answers If-Modified-Since with 304):
+
+    python -m http.server --directory data 8000
+    python chair.py --papers http://localhost:8000/papers.csv --reviews http://localhost:8000/reviews.csv
+'''
+
+MAX_REDIRECTS = 5
+TIMEOUT = 60
+
+def is_url(path):
+    return path.startswith('http://') or path.startswith('https://')
+
+class ConnectionPool:
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self.idle = {} # (scheme, host) -> list of connections
+        self.lock = threading.Lock()
+
+    def get(self, scheme, host):
+        with self.lock:
+            conns = self.idle.get((scheme, host))
+            if conns:
+                return conns.pop(), True
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, timeout=self.timeout), False
+
+    def put(self, scheme, host, conn):
+        with self.lock:
+            self.idle.setdefault((scheme, host), []).append(conn)
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle = {}
+
+def cache_paths(cache_dir, url):
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return f'{cache_dir}/{key}.json', f'{cache_dir}/{key}.csv'
+
+def read_cache(cache_dir, url):
+    meta_file, rows_file = cache_paths(cache_dir, url)
+    if not (os.path.exists(meta_file) and os.path.exists(rows_file)):
+        return {}
+    with open(meta_file, 'r') as f:
+        return json.load(f)
+
+def read_cached_rows(cache_dir, url):
+    _, rows_file = cache_paths(cache_dir, url)
+    with open(rows_file, 'r', newline='') as f:
+        return [row for row in csv.reader(f)]
+
+def write_cache(cache_dir, url, meta, rows):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_file, rows_file = cache_paths(cache_dir, url)
+    with open(rows_file, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
+    # meta last, so a half-written cache is never trusted
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f)
+
+def conditional_headers(meta):
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+# rows of the CSV body, without the header, parsed as the bytes arrive
+def stream_csv_rows(response):
+    text = io.TextIOWrapper(response, encoding='utf-8', newline='')
+    reader = csv.reader(text)
+    next(reader, None) # skip header
+    rows = [row for row in reader]
+    text.detach()
+    return rows
+
+# one GET on a pooled connection; retries once if a reused connection was closed
+def request(pool, url, headers):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    for attempt in range(2):
+        conn, reused = pool.get(parts.scheme, parts.netloc)
+        try:
+            conn.request('GET', path, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            if not reused or attempt:
+                raise
+
+def release(pool, url, conn, response):
+    parts = urlsplit(url)
+    if response.will_close:
+        conn.close()
+    else:
+        pool.put(parts.scheme, parts.netloc, conn)
+
+def fetch_csv_rows(pool, url, cache_dir):
+    meta = read_cache(cache_dir, url)
+    headers = conditional_headers(meta)
+    target = url
+    for _ in range(MAX_REDIRECTS):
+        conn, response = request(pool, target, headers)
+        status = response.status
+        if status in (301, 302, 303, 307, 308):
+            location = response.getheader('Location')
+            response.read()
+            release(pool, target, conn, response)
+            target = urljoin(target, location)
+            continue
+        if status == 304:
+            response.read()
+            release(pool, target, conn, response)
+            return read_cached_rows(cache_dir, url)
+        if status != 200:
+            response.read()
+            release(pool, target, conn, response)
+            raise RuntimeError(f'{url}: HTTP {status} {response.reason}')
+        rows = stream_csv_rows(response)
+        meta = {
+            'etag': response.getheader('ETag'),
+            'last_modified': response.getheader('Last-Modified'),
+        }
+        release(pool, target, conn, response)
+        if meta['etag'] or meta['last_modified']:
+            write_cache(cache_dir, url, meta, rows)
+        return rows
+    raise RuntimeError(f'{url}: too many redirects')
+
+# fetches all urls at once; returns their rows in the same order
+def fetch_all_csv_rows(urls, cache_dir):
+    pool = ConnectionPool()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(urls))) as executor:
+            futures = [executor.submit(fetch_csv_rows, pool, url, cache_dir) for url in urls]
+            return [future.result() for future in futures]
+    finally:
+        pool.close()
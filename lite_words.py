@@ -0,0 +1,63 @@
+import random
+
+'''
+Small bundled name and word lists for fake.py --lite, standing in for Faker
+so quick smoke-test datasets don't pay for importing it. LiteFaker has just
+the methods fake.py uses, with roughly Faker's behavior (sentence and
+paragraph lengths vary by up to 40% around the requested size).
+'''
+
+FIRST_NAMES = '''
+Aaron Abby Adam Ada Adrian Aisha Alan Alice Amir Amy Ana Andre Anna Anton
+Aria Arjun Ben Bianca Boris Brian Bruno Carla Carlos Chen Chloe Chris Clara
+Dana Daniel Dara David Diego Dmitri Elena Eli Emma Eric Erin Ethan Eva Farah
+Felix Fiona Frank Gabriel Grace Greta Hana Hannah Hiro Hugo Ian Ines Irene
+Isaac Ivan Jack Jae James Jana Javier Jin Joan John Jonas Julia Kai Karen
+Karl Kate Kenji Kim Lara Laura Leo Lena Liam Lily Lina Luca Lucy Luis Maya
+Mei Mia Miguel Mila Mina Nadia Nate Nina Noah Nora Olga Omar Oscar Paul Petra
+Priya Quinn Rafael Rami Rosa Ruth Sam Sara Sean Sofia Sven Tara Theo Tom Uma
+Vera Victor Wei Yara Yuki Zoe
+'''.split()
+
+LAST_NAMES = '''
+Abbott Adams Ahmed Alvarez Andersen Baker Banerjee Becker Bell Berg Brooks
+Brown Bui Campbell Carter Castro Chang Chen Clark Cohen Cruz Das Davis Diaz
+Dubois Edwards Evans Fischer Fisher Flores Ford Garcia Gomez Gonzalez Gray
+Green Gupta Hall Hansen Harris Hayes Hill Ho Hoffman Huang Hughes Ito Jackson
+James Jensen Johnson Jones Kato Kelly Khan Kim King Klein Kowalski Kumar Lam
+Larsen Lee Lewis Li Lin Liu Lopez Martin Meyer Miller Moore Morales Murphy
+Nakamura Nguyen Novak Olsen Ortiz Park Patel Perez Peters Petrov Quinn Ramos
+Reed Reyes Rivera Roberts Rossi Ruiz Sanchez Sato Schmidt Scott Shah Silva
+Singh Smith Suzuki Tan Taylor Thomas Torres Tran Turner Wagner Walker Wang
+Watson White Wong Wright Wu Yamamoto Yang Young Zhang Zhou
+'''.split()
+
+WORDS = '''
+adaptive animation appearance approach based capture character cloth
+collision compact complex contact data deep deformation design differentiable
+diffusion display dynamic editing efficient elastic estimation fabrication
+fast field fluid form frame function geometry global gradient graph hair human
+illumination image implicit interactive inverse learned light material mesh
+method model motion network neural novel optimization painting particle path
+perception physics point pose procedural progressive radiance real reconstruction
+rendering representation robust sampling scene shape simulation skeleton
+sketch smooth sound space sparse spectral stable structure style surface
+synthesis temporal texture time tracking transport unified video view
+virtual volume wave
+'''.split()
+
+class LiteFaker:
+    def first_name(self):
+        return random.choice(FIRST_NAMES)
+
+    def last_name(self):
+        return random.choice(LAST_NAMES)
+
+    def sentence(self, nb_words=6):
+        n = max(1, int(nb_words * random.uniform(0.6, 1.4) + 0.5))
+        words = random.choices(WORDS, k=n)
+        return ' '.join(words).capitalize() + '.'
+
+    def paragraph(self, nb_sentences=3):
+        n = max(1, int(nb_sentences * random.uniform(0.6, 1.4) + 0.5))
+        return ' '.join(self.sentence() for _ in range(n))
@@ -0,0 +1,208 @@
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+'''
+Runs the usual workflow, fake.py (optional) -> chair.py -> plot.py, rebuilding
+only the stages whose inputs or parameters changed since the last run:
+
+    python pipeline.py --dir data --fake --num_papers 200
+    python pipeline.py --dir data            # e.g. after a new Linklings export
+
+For each stage the runner records, in data/pipeline_state.json, its parameters
+and a signature of every input file (size, mtime and a content hash). A stage
+is skipped when its parameters match, its outputs exist, and every input has
+the same signature. Size and mtime are checked first, so unchanged inputs are
+not even re-hashed, and a no-op refresh takes milliseconds. If an input was
+rewritten with identical contents (e.g. chair.py re-ran and produced the same
+stats.csv), the hash still matches and later stages are skipped.
+
+Stages in the same step don't depend on each other and run concurrently:
+the overall histogram and one histogram per room (from stats.csv rows of the
+papers in that room).
+'''
+
+STATE_FILE = 'pipeline_state.json'
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class Stage:
+    def __init__(self, name, inputs, outputs, params, run):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.params = params
+        self.run = run
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# [size, mtime_ns, hash]; reuses the old hash when size and mtime match
+def file_signature(path, old=None):
+    st = os.stat(path)
+    if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+        return old
+    return [st.st_size, st.st_mtime_ns, hash_file(path)]
+
+def read_state(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, 'r') as f:
+        return json.load(f)
+
+def write_state(state_file, state):
+    with open(state_file, 'w') as f:
+        json.dump(state, f, indent=1)
+
+def input_signatures(stage, record):
+    old = record.get('inputs', {}) if record else {}
+    return {path: file_signature(path, old.get(path)) for path in stage.inputs}
+
+def is_stale(stage, record):
+    if not record or record.get('params') != stage.params:
+        return True
+    if not all(os.path.exists(path) for path in stage.outputs):
+        return True
+    if not all(os.path.exists(path) for path in stage.inputs):
+        return True
+    new = input_signatures(stage, record)
+    old = record.get('inputs', {})
+    # compare content hashes only; mtime alone doesn't make a stage stale
+    return any(old.get(path, [None] * 3)[2] != sig[2] for path, sig in new.items())
+
+def run_command(args):
+    subprocess.run([sys.executable] + args, check=True, stdout=subprocess.DEVNULL)
+
+# runs the stale stages of one step concurrently; returns names of stages run
+def run_step(stages, state, force, workers):
+    stale = [stage for stage in stages if force or is_stale(stage, state.get(stage.name))]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for stage, future in [(s, executor.submit(s.run)) for s in stale]:
+            future.result()
+    for stage in stages:
+        # stages that ran get fresh hashes; the others just refresh their
+        # size and mtime (cheap), so the next check stays on the fast path
+        record = None if stage in stale else state[stage.name]
+        state[stage.name] = {
+            'params': stage.params,
+            'inputs': input_signatures(stage, record),
+        }
+    return [stage.name for stage in stale]
+
+def fake_stage(data_dir, args):
+    outputs = [f'{data_dir}/{name}.csv' for name in
+               ['users', 'papers', 'conflicts', 'clusters', 'reviews', 'history']]
+    inputs = [args.scenario] if args.scenario else []
+    params = {'num_users': args.num_users, 'num_papers': args.num_papers,
+              'scenario': args.scenario}
+    command = [f'{HERE}/fake.py', '--dir', data_dir,
+               '--num_users', str(args.num_users), '--num_papers', str(args.num_papers)]
+    if args.scenario:
+        command += ['--scenario', args.scenario]
+    return Stage('fake', inputs, outputs, params, lambda: run_command(command))
+
+def chair_stage(data_dir, args):
+    inputs = [f'{data_dir}/papers.csv', f'{data_dir}/reviews.csv']
+    outputs = [f'{data_dir}/chair.csv', f'{data_dir}/stats.csv']
+    params = {'chair_args': args.chair_args}
+    command = [f'{HERE}/chair.py', '--dir', data_dir, '--stats', 'stats.csv'] + args.chair_args
+    return Stage('chair', inputs, outputs, params, lambda: run_command(command))
+
+def plot_stage(data_dir):
+    stats_file = f'{data_dir}/stats.csv'
+    hist_file = f'{data_dir}/hist.png'
+    command = [f'{HERE}/plot.py', stats_file, hist_file]
+    return Stage('plot', [stats_file], [hist_file], {}, lambda: run_command(command))
+
+def read_rooms(papers_file):
+    rooms = {}
+    with open(papers_file, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None) # skip header
+        for row in reader:
+            if len(row) > 6 and row[6]:
+                rooms.setdefault(row[6], set()).add(row[0])
+    return rooms
+
+def write_room_stats(stats_file, pids, room_stats_file):
+    with open(stats_file, 'r') as f, open(room_stats_file, 'w') as out:
+        out.write(next(f, ''))
+        for line in f:
+            if line.split(',', 1)[0] in pids:
+                out.write(line)
+
+def room_plot_stage(data_dir, room, pids):
+    papers_file = f'{data_dir}/papers.csv'
+    stats_file = f'{data_dir}/stats.csv'
+    room_stats_file = f'{data_dir}/stats_{room}.csv'
+    hist_file = f'{data_dir}/hist_{room}.png'
+    def run():
+        write_room_stats(stats_file, pids, room_stats_file)
+        run_command([f'{HERE}/plot.py', room_stats_file, hist_file])
+    return Stage(f'plot {room}', [papers_file, stats_file],
+                 [room_stats_file, hist_file], {}, run)
+
+def plot_stages(data_dir):
+    stages = [plot_stage(data_dir)]
+    for room, pids in sorted(read_rooms(f'{data_dir}/papers.csv').items()):
+        stages.append(room_plot_stage(data_dir, room, pids))
+    return stages
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dir', default='data',
+                        help='directory for input/output CSVs')
+    parser.add_argument('--fake', action='store_true',
+                        help='generate the inputs with fake.py (otherwise use the exports in --dir)')
+    parser.add_argument('--num_users', type=int, default=50,
+                        help='with --fake, number of users')
+    parser.add_argument('--num_papers', type=int, default=200,
+                        help='with --fake, number of papers')
+    parser.add_argument('--scenario', default='',
+                        help='with --fake, JSON stress-scenario profile')
+    parser.add_argument('--skip_plots', action='store_true',
+                        help='stop after chair.py (plot.py needs matplotlib)')
+    parser.add_argument('--force', action='store_true',
+                        help='rerun every stage')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='stages run at once within a step')
+    parser.add_argument('chair_args', nargs=argparse.REMAINDER,
+                        help='extra chair.py options, after --')
+    args = parser.parse_args()
+    if args.chair_args[:1] == ['--']:
+        args.chair_args = args.chair_args[1:]
+    return args
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    data_dir = args.dir
+    state_file = f'{data_dir}/{STATE_FILE}'
+    state = read_state(state_file)
+    steps = []
+    if args.fake:
+        os.makedirs(data_dir, exist_ok=True)
+        steps.append(lambda: [fake_stage(data_dir, args)])
+    steps.append(lambda: [chair_stage(data_dir, args)])
+    if not args.skip_plots:
+        steps.append(lambda: plot_stages(data_dir)) # rooms come from papers.csv
+    ran = []
+    try:
+        for step in steps:
+            ran += run_step(step(), state, args.force, args.workers)
+    finally:
+        write_state(state_file, state)
+    seconds = round(time.perf_counter() - start, 3)
+    print(f'ran {", ".join(ran) if ran else "nothing (all up to date)"} in {seconds}s')
+
+if __name__ == "__main__":
+    main()
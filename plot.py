@@ -20,14 +20,16 @@ def read_csv_from_file(fname):
         rows = read_csv_rows(reader)
         return rows
 
-def get_conf_from_dual(rows):
+# stats.csv from chair.py --stats:
+# Submission ID,Dual Track,Mean Score,Conf/Journal Mean,Reviews,Status
+def get_score_from_dual(rows):
     return [float(row[2]) for row in rows if row[1] == 'True']
 
-def get_jour_from_dual(rows):
-    return [float(row[3]) for row in rows if row[1] == 'True']
+def get_score_from_jour(rows):
+    return [float(row[2]) for row in rows if row[1] == 'False']
 
-def get_jour_from_jour(rows):
-    return [float(row[3]) for row in rows if row[1] == 'False']
+def get_conf_jour_from_dual(rows):
+    return [float(row[3]) for row in rows if row[1] == 'True']
 
 def dump_stats(arr, name):
     minimum = 0
@@ -65,27 +67,34 @@ def main():
     rows = read_csv_from_file(stats_file)
 
     # read rows into score distribution arrays
-    dual_conf = get_conf_from_dual(rows)
-    dual_jour = get_jour_from_dual(rows)
-    jour_jour = get_jour_from_jour(rows)
-    dual_all = dual_conf + dual_jour
+    dual_score = get_score_from_dual(rows)
+    jour_score = get_score_from_jour(rows)
+    dual_cj = get_conf_jour_from_dual(rows)
+    all_score = dual_score + jour_score
 
     # dump some stats on those arrays
-    dump_stats(dual_conf, 'dual_conf')
-    dump_stats(dual_jour, 'dual_jour')
-    dump_stats(jour_jour, 'jour_jour')
-    dump_stats(dual_all,  'dual_all')
+    dump_stats(dual_score, 'dual_score')
+    dump_stats(jour_score, 'jour_score')
+    dump_stats(dual_cj, 'dual_cj')
+    dump_stats(all_score, 'all_score')
 
-    # mae histograms and save in image
+    # make histograms and save in image: mean review scores (-5 to 5) on top,
+    # mean conf/journal codes (-3 to 2) below, since the axes mean different things
+    fig, (score_ax, cj_ax) = pyplot.subplots(2, 1, figsize=(6.4, 8))
     bins = numpy.linspace(-5, 5, 12)
-    hatch_dual_conf = 2*'/'
-    hatch_dual_jour = 2*'\\'
-    hatch_jour_jour = '.'
-    pyplot.hist(dual_conf, bins, label='dual_conf', hatch=hatch_dual_conf, edgecolor='black', alpha=0.5)
-    pyplot.hist(dual_jour, bins, label='dual_jour', hatch=hatch_dual_jour, edgecolor='black', alpha=0.5)
-    pyplot.hist(jour_jour, bins, label='jour_jour', hatch=hatch_jour_jour, edgecolor='black', alpha=0.5)
-    pyplot.hist(dual_all, bins, label='dual_all', edgecolor='black', alpha=0.1)
-    pyplot.legend(loc='upper right')
+    hatch_dual_score = 2*'/'
+    hatch_jour_score = 2*'\\'
+    hatch_dual_cj = '.'
+    score_ax.hist(dual_score, bins, label='dual_score', hatch=hatch_dual_score, edgecolor='black', alpha=0.5)
+    score_ax.hist(jour_score, bins, label='jour_score', hatch=hatch_jour_score, edgecolor='black', alpha=0.5)
+    score_ax.hist(all_score, bins, label='all_score', edgecolor='black', alpha=0.1)
+    score_ax.set_xlabel('mean review score')
+    score_ax.legend(loc='upper right')
+    cj_bins = numpy.linspace(-3, 2, 11)
+    cj_ax.hist(dual_cj, cj_bins, label='dual_cj', hatch=hatch_dual_cj, edgecolor='black', alpha=0.5)
+    cj_ax.set_xlabel('mean conf/journal code (dual track)')
+    cj_ax.legend(loc='upper right')
+    fig.tight_layout()
     # pyplot.show()
     pyplot.savefig(hist_file)
 
@@ -0,0 +1,343 @@
+import os
+import csv
+import time
+import array
+import struct
+import argparse
+
+'''
+Conflict-aware index for room chairs: who must leave the room for a paper,
+and when they can come back. Built from three exports in a data directory:
+
+* users.csv: Email,First Name,Last Name,Rooms,Role,Password (Rooms is ";"-separated)
+* papers.csv: Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract
+* conflicts.csv: Submission ID,Email
+
+and saved next to them as conflict_index.bin, which is rebuilt automatically
+when any of the three CSVs changes size or modification time (so an older
+export copied in with cp -p or unzip still counts as a change). Loading it
+reads a few flat arrays and takes milliseconds even for a large meeting:
+
+    python roomindex.py --dir data --paper papers_101
+    python roomindex.py --dir data --email someone@example.com
+    python roomindex.py --dir data --room Room_1A
+    python roomindex.py --dir data --room Room_1A --order order.txt
+
+The index keeps, for every paper, the emails conflicted with it; for every
+email, the papers it is conflicted with; for every room, its members; and for
+every room, its discussion order (the papers in that room, in papers.csv order,
+without exceptions such as Withdrawn). A per-paper query costs O(k) for k
+conflicts. --order gives a different discussion order, one pid per line.
+
+For a room's discussion order, the leave/return events are the fewest that
+keep every member out of the room for exactly the papers they are conflicted
+with: someone conflicted with two consecutive papers stays out for both, and
+returns before the first paper they may discuss (or at the end of the session).
+
+Layout of conflict_index.bin (little-endian): magic "HCIX", version (u16),
+number of sections (u16), the size and mtime in ns (i64 each, size -1 if
+missing) of each source CSV the index was built from, then each section as a
+u32 byte length followed by its bytes, padded to 4 bytes. The first three sections are the pids, emails
+and rooms as newline-separated UTF-8; the rest are u32 arrays, in pairs of
+offsets and values (one row per pid, email or room, as in a CSR matrix):
+conflicted emails by pid, conflicted pids by email, members by room, and
+discussion order by room.
+'''
+
+INDEX_FILE = 'conflict_index.bin'
+SOURCE_FILES = ['users.csv', 'papers.csv', 'conflicts.csv']
+MAGIC = b'HCIX'
+VERSION = 2
+HEADER = struct.Struct('<4sHH')
+SOURCE = struct.Struct('<qq')
+LENGTH = struct.Struct('<I')
+
+def read_rows(fname):
+    if not os.path.exists(fname):
+        return []
+    with open(fname, 'r') as f:
+        reader = csv.reader(f)
+        next(reader, None) # skip header
+        return [row for row in reader if row]
+
+# lists of ids -> (offsets, values) arrays; row i is values[offsets[i]:offsets[i + 1]]
+def pack_rows(rows):
+    offsets = array.array('I', [0])
+    values = array.array('I')
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+class Names:
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self.ids[name]
+
+class ConflictIndex:
+    def __init__(self, pids, emails, rooms, sections):
+        self.pids = pids
+        self.emails = emails
+        self.rooms = rooms
+        (self.conflict_offsets, self.conflict_emails,
+         self.reverse_offsets, self.reverse_pids,
+         self.member_offsets, self.members,
+         self.order_offsets, self.orders) = sections
+        self.member_sets = {} # room id -> set of email ids, filled in as needed
+
+    def row(self, offsets, values, i):
+        return values[offsets[i]:offsets[i + 1]]
+
+    # single lookups, O(k) in the size of the answer
+
+    def conflicted_emails(self, pid):
+        i = self.pids.ids.get(pid)
+        if i is None:
+            return []
+        return [self.emails.names[e] for e in
+                self.row(self.conflict_offsets, self.conflict_emails, i)]
+
+    def conflicted_pids(self, email):
+        i = self.emails.ids.get(email)
+        if i is None:
+            return []
+        return [self.pids.names[p] for p in
+                self.row(self.reverse_offsets, self.reverse_pids, i)]
+
+    def room_members(self, room):
+        i = self.rooms.ids.get(room)
+        if i is None:
+            return []
+        return [self.emails.names[e] for e in
+                self.row(self.member_offsets, self.members, i)]
+
+    def room_order(self, room):
+        i = self.rooms.ids.get(room)
+        if i is None:
+            return []
+        return [self.pids.names[p] for p in
+                self.row(self.order_offsets, self.orders, i)]
+
+    def member_set(self, room_id):
+        if room_id not in self.member_sets:
+            self.member_sets[room_id] = set(
+                self.row(self.member_offsets, self.members, room_id))
+        return self.member_sets[room_id]
+
+    # email ids of room members conflicted with the paper
+    def leaving_ids(self, pid, room_id):
+        i = self.pids.ids.get(pid)
+        if i is None:
+            return set()
+        members = self.member_set(room_id)
+        return {e for e in self.row(self.conflict_offsets, self.conflict_emails, i)
+                if e in members}
+
+    # room members who must leave the room while the paper is discussed
+    def must_leave(self, pid, room):
+        room_id = self.rooms.ids.get(room)
+        if room_id is None:
+            return []
+        return sorted(self.emails.names[e] for e in self.leaving_ids(pid, room_id))
+
+    # fewest leave/return events for a room's discussion order (default: the
+    # room's papers in papers.csv order), as (position, Submission ID, event,
+    # Email) tuples; events at a position happen before that paper is
+    # discussed, and the returns after the last paper have position len(order)
+    def leave_return_events(self, room, order=None):
+        room_id = self.rooms.ids.get(room)
+        if room_id is None:
+            return []
+        if order is None:
+            order = self.room_order(room)
+        events = []
+        out = set()
+        for position, pid in enumerate(order):
+            leaving = self.leaving_ids(pid, room_id)
+            for e in sorted(out - leaving, key=self.emails.names.__getitem__):
+                events.append((position, pid, 'return', self.emails.names[e]))
+            for e in sorted(leaving - out, key=self.emails.names.__getitem__):
+                events.append((position, pid, 'leave', self.emails.names[e]))
+            out = leaving
+        for e in sorted(out, key=self.emails.names.__getitem__):
+            events.append((len(order), '', 'return', self.emails.names[e]))
+        return events
+
+def build_index(data_dir):
+    users = read_rows(f'{data_dir}/users.csv')
+    papers = read_rows(f'{data_dir}/papers.csv')
+    conflicts = read_rows(f'{data_dir}/conflicts.csv')
+    pids = Names(row[0] for row in papers)
+    emails = Names(row[0] for row in users)
+    rooms = Names()
+    members = []
+    for email_id, row in enumerate(users):
+        for room in (row[3] if len(row) > 3 else '').split(';'):
+            if room:
+                room_id = rooms.add(room)
+                if room_id == len(members):
+                    members.append([])
+                members[room_id].append(email_id)
+    by_pid = [[] for _ in pids.names]
+    by_email = [[] for _ in emails.names]
+    for row in conflicts:
+        if len(row) < 2:
+            continue
+        pid_id = pids.add(row[0])
+        email_id = emails.add(row[1])
+        by_pid += [[] for _ in range(len(pids) - len(by_pid))]
+        by_email += [[] for _ in range(len(emails) - len(by_email))]
+        if email_id not in by_pid[pid_id]:
+            by_pid[pid_id].append(email_id)
+            by_email[email_id].append(pid_id)
+    orders = [[] for _ in rooms.names]
+    for pid_id, row in enumerate(papers):
+        exception = row[1] if len(row) > 1 else ''
+        room = row[6] if len(row) > 6 else ''
+        if room and not exception:
+            room_id = rooms.add(room)
+            if room_id == len(orders):
+                orders.append([])
+            orders[room_id].append(pid_id)
+    members += [[] for _ in range(len(rooms) - len(members))]
+    sections = []
+    for rows in [by_pid, by_email, members, orders]:
+        sections += pack_rows(rows)
+    return ConflictIndex(pids, emails, rooms, sections)
+
+def pad4(n):
+    return (n + 3) & ~3
+
+# (size, mtime_ns) of each source CSV, (-1, 0) for a missing one
+def source_signatures(data_dir):
+    signatures = []
+    for name in SOURCE_FILES:
+        try:
+            st = os.stat(f'{data_dir}/{name}')
+            signatures.append((st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            signatures.append((-1, 0))
+    return signatures
+
+def write_index(index, fname, sources):
+    blobs = ['\n'.join(names.names).encode() for names in
+             [index.pids, index.emails, index.rooms]]
+    arrays = [index.conflict_offsets, index.conflict_emails,
+              index.reverse_offsets, index.reverse_pids,
+              index.member_offsets, index.members,
+              index.order_offsets, index.orders]
+    blobs += [values.tobytes() for values in arrays]
+    with open(fname, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(blobs)))
+        for size, mtime_ns in sources:
+            f.write(SOURCE.pack(size, mtime_ns))
+        for blob in blobs:
+            f.write(LENGTH.pack(len(blob)))
+            f.write(blob)
+            f.write(b'\0' * (pad4(len(blob)) - len(blob)))
+
+def read_index(fname):
+    with open(fname, 'rb') as f:
+        data = f.read()
+    magic, version, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{fname} is not a version {VERSION} conflict index')
+    blobs = []
+    offset = HEADER.size + SOURCE.size * len(SOURCE_FILES)
+    for _ in range(count):
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        blobs.append(data[offset:offset + length])
+        offset += pad4(length)
+    names = [Names(blob.decode().split('\n') if blob else []) for blob in blobs[:3]]
+    sections = []
+    for blob in blobs[3:]:
+        values = array.array('I')
+        values.frombytes(blob)
+        sections.append(values)
+    return ConflictIndex(*names, sections)
+
+# source signatures recorded in an index file, or None if it isn't one we can read
+def read_index_sources(index_file):
+    size = HEADER.size + SOURCE.size * len(SOURCE_FILES)
+    try:
+        with open(index_file, 'rb') as f:
+            data = f.read(size)
+    except FileNotFoundError:
+        return None
+    if len(data) < size:
+        return None
+    magic, version, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return [SOURCE.unpack_from(data, HEADER.size + i * SOURCE.size)
+            for i in range(len(SOURCE_FILES))]
+
+def is_stale(data_dir, index_file):
+    return read_index_sources(index_file) != source_signatures(data_dir)
+
+# loads data_dir's index file, (re)building it first if needed
+def load_index(data_dir, index_file=None, rebuild=False):
+    if not index_file:
+        index_file = f'{data_dir}/{INDEX_FILE}'
+    if rebuild or is_stale(data_dir, index_file):
+        sources = source_signatures(data_dir) # before reading, so edits meanwhile show up
+        write_index(build_index(data_dir), index_file, sources)
+    return read_index(index_file)
+
+def read_order(fname):
+    with open(fname, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dir', default='data',
+                        help='directory of input CSVs (and of the index file)')
+    parser.add_argument('--index', default=INDEX_FILE,
+                        help='filename of the index file in --dir')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='rebuild the index even if it is up to date')
+    parser.add_argument('--paper',
+                        help='list emails conflicted with this paper (and who leaves its room)')
+    parser.add_argument('--email',
+                        help='list papers this email is conflicted with')
+    parser.add_argument('--room',
+                        help='list leave/return events for this room as CSV')
+    parser.add_argument('--order',
+                        help='with --room, file of pids in discussion order, one per line')
+    args = parser.parse_args()
+    args.index_file = f'{args.dir}/{args.index}'
+    return args
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    index = load_index(args.dir, args.index_file, args.rebuild)
+    ms = round((time.perf_counter() - start) * 1000, 1)
+    print(f'{len(index.pids)} papers, {len(index.emails)} emails, '
+          f'{len(index.rooms)} rooms, {len(index.conflict_emails)} conflicts '
+          f'(loaded in {ms} ms)')
+    if args.paper:
+        print(f'{args.paper} conflicts: {", ".join(index.conflicted_emails(args.paper))}')
+        for room in index.rooms.names:
+            if args.paper in index.room_order(room):
+                print(f'leave {room}: {", ".join(index.must_leave(args.paper, room))}')
+    if args.email:
+        print(f'{args.email} conflicts: {", ".join(index.conflicted_pids(args.email))}')
+    if args.room:
+        order = read_order(args.order) if args.order else None
+        print('Order,Submission ID,Event,Email')
+        for position, pid, event, email in index.leave_return_events(args.room, order):
+            print(f'{position},{pid},{event},{email}')
+
+if __name__ == "__main__":
+    main()
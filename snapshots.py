@@ -0,0 +1,157 @@
+import os
+import bisect
+import argparse
+from datetime import datetime
+
+'''
+Append-only log of chair.py results, one run at a time (chair.py --log).
+
+Each run appends only the rows that changed since the previous run:
+* chair_log.csv: When,Submission ID,Sort Score,Status,Reviews,Tags,Change
+where Change is added, changed or removed (removed rows leave the other fields
+blank), and When is the run timestamp, like "2025-01-01 10:30:00".
+
+Two small files sit next to the log:
+* chair_log_index.csv: When,Offset,Count - byte offset of each run in the log
+* chair_log_state.csv: Submission ID,Hash - hashes of the latest run, written
+  by chair.py so the next run can tell what changed without reading the log
+
+With the index, "what changed between t1 and t2" seeks straight to the first
+run after t1 and reads only those runs, and the state at time t is rebuilt from
+the changes up to t rather than from full snapshots.
+
+To query the log:
+
+    python snapshots.py --dir data --at "2025-01-01 10:30:00"
+    python snapshots.py --dir data --since "2025-01-01 09:00:00" --until "2025-01-01 12:00:00"
+'''
+
+LOG_HEADER = 'When,Submission ID,Sort Score,Status,Reviews,Tags,Change\n'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def index_file_name(log_file):
+    base, ext = os.path.splitext(log_file)
+    return f'{base}_index{ext}'
+
+def state_file_name(log_file):
+    base, ext = os.path.splitext(log_file)
+    return f'{base}_state{ext}'
+
+# the state file only describes the log if the log and its index both exist
+def has_log(log_file):
+    return os.path.exists(log_file) and os.path.exists(index_file_name(log_file))
+
+def now_string():
+    return datetime.now().strftime(TIME_FORMAT)
+
+# index: list of (when, offset, count), oldest first
+def read_index(index_file):
+    index = []
+    if not os.path.exists(index_file):
+        return index
+    with open(index_file, 'r') as f:
+        next(f, None) # skip header
+        for line in f:
+            when, offset, count = line.rstrip('\n').split(',')
+            index.append((when, int(offset), int(count)))
+    return index
+
+# lines are chair rows ending in a Change field (see chair.get_delta_lines)
+def append_run(log_file, lines, when=None):
+    when = when or now_string()
+    index_file = index_file_name(log_file)
+    new_log = not os.path.exists(log_file)
+    with open(log_file, 'ab') as f:
+        if new_log:
+            f.write(LOG_HEADER.encode())
+        offset = f.tell()
+        f.write(''.join(f'{when},{line}' for line in lines).encode())
+    # a new log starts a new index, since old offsets would point into the old log
+    new_index = new_log or not os.path.exists(index_file)
+    with open(index_file, 'w' if new_index else 'a') as f:
+        if new_index:
+            f.write('When,Offset,Count\n')
+        f.write(f'{when},{offset},{len(lines)}\n')
+    return when
+
+# byte range of the log covering runs first..last-1 of the index
+def run_range(log_file, index, first, last):
+    if first >= last:
+        return 0, 0
+    start = index[first][1]
+    end = index[last][1] if last < len(index) else os.path.getsize(log_file)
+    return start, end
+
+def read_log_lines(log_file, start, end):
+    if start >= end:
+        return []
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return data.decode().splitlines(keepends=True)
+
+# log line -> (when, pid, chair line or None if removed, change)
+def parse_log_line(line):
+    when, rest = line.split(',', 1)
+    row, change = rest.rstrip('\n').rsplit(',', 1)
+    pid = row.split(',', 1)[0]
+    chair_line = None if change == 'removed' else row + '\n'
+    return when, pid, chair_line, change
+
+def runs_after(index, t):
+    return bisect.bisect_right([when for when, _, _ in index], t)
+
+# log lines for runs with t1 < When <= t2
+def changes_between(log_file, t1, t2):
+    index = read_index(index_file_name(log_file))
+    first = runs_after(index, t1)
+    last = runs_after(index, t2)
+    start, end = run_range(log_file, index, first, last)
+    return [parse_log_line(line) for line in read_log_lines(log_file, start, end)]
+
+# pid -> chair line as of time t (latest run with When <= t), in first-seen order
+def state_at(log_file, t):
+    state = {}
+    for _, pid, chair_line, _ in changes_between(log_file, '', t):
+        if chair_line is None:
+            state.pop(pid, None)
+        else:
+            state[pid] = chair_line
+    return state
+
+def changed_pids_between(log_file, t1, t2):
+    pids = {}
+    for _, pid, _, change in changes_between(log_file, t1, t2):
+        pids[pid] = change
+    return pids
+
+def parse_args():
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dir', default='data',
+                        help='directory of the log')
+    parser.add_argument('--log', default='chair_log.csv',
+                        help='filename of the log written by chair.py --log')
+    parser.add_argument('--at',
+                        help='print chair rows as of this time')
+    parser.add_argument('--since',
+                        help='print papers that changed after this time')
+    parser.add_argument('--until', default='9999',
+                        help='with --since, only changes up to this time')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    log_file = f'{args.dir}/{args.log}'
+    if args.at:
+        state = state_at(log_file, args.at)
+        print('Submission ID,Sort Score,Status,Reviews,Tags')
+        print(''.join(state.values()), end='')
+    elif args.since:
+        for pid, change in changed_pids_between(log_file, args.since, args.until).items():
+            print(f'{pid},{change}')
+    else:
+        for when, _, count in read_index(index_file_name(log_file)):
+            print(f'{when}: {count} changed rows')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import csv
+import sqlite3
+
+'''
+Optional SQLite storage shared by chair.py (--db) and fake.py (--db).
+
+Tables mirror the CSVs, one column per CSV field, with values kept as the
+original text so chair.py computes exactly the same results from either source:
+
+* papers: Submission ID,Exception,Thumbnail URL,Title,Area,Track,Room,Abstract
+* reviews: Submission ID,Role,Score,Conf/Journal Rec,Expertise,Final Recommendation,Top 10%
+* chair: Submission ID,Sort Score,Status,Reviews,Tags (output of chair.py)
+
+Papers (and chair rows) also store seq, their position in the CSV, so they
+are read back in file order. Reviews have no ID of their own, so a review is
+keyed by (Submission ID, n) where n counts earlier reviews of the same paper;
+they are read back by paper order and then n, the same order as in the CSV.
+
+Ingesting is an upsert inside one transaction: unchanged rows are not written,
+changed rows are updated, and rows missing from the new CSV are deleted. seq
+isn't part of a row's contents: it is brought up to date in a separate pass
+afterwards, so a row inserted mid-file counts as one change, not one per
+later row.
+
+The tables are only a copy of the CSVs, so a database from an older version
+of this schema is dropped and rebuilt on the next ingest.
+'''
+
+SCHEMA_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS papers (
+    pid TEXT PRIMARY KEY, seq INTEGER,
+    exception TEXT, thumbnail TEXT, title TEXT, area TEXT,
+    track TEXT, room TEXT, abstract TEXT);
+CREATE TABLE IF NOT EXISTS reviews (
+    pid TEXT, n INTEGER, role TEXT,
+    score TEXT, conf_jour TEXT, expertise TEXT, final_rec TEXT, top TEXT,
+    PRIMARY KEY (pid, n));
+CREATE INDEX IF NOT EXISTS reviews_role ON reviews (role);
+CREATE TABLE IF NOT EXISTS chair (
+    pid TEXT PRIMARY KEY, seq INTEGER,
+    sort_score REAL, status TEXT, reviews TEXT, tags TEXT);
+'''
+# (the reviews primary key already indexes lookups by pid)
+
+# CSV fields, in CSV order, for each table
+TABLE_COLUMNS = {
+    'papers': ['pid', 'exception', 'thumbnail', 'title', 'area', 'track', 'room', 'abstract'],
+    'reviews': ['pid', 'role', 'score', 'conf_jour', 'expertise', 'final_rec', 'top'],
+    'chair': ['pid', 'sort_score', 'status', 'reviews', 'tags'],
+}
+
+TABLE_KEYS = {
+    'papers': ['pid'],
+    'reviews': ['pid', 'n'],
+    'chair': ['pid'],
+}
+
+# which CSV file feeds which table
+CSV_TABLES = {
+    'papers.csv': 'papers',
+    'reviews.csv': 'reviews',
+}
+
+def connect(db_file):
+    conn = sqlite3.connect(db_file)
+    (version,) = conn.execute('PRAGMA user_version').fetchone()
+    if version != SCHEMA_VERSION:
+        with conn:
+            for table in TABLE_COLUMNS:
+                conn.execute(f'DROP TABLE IF EXISTS {table}')
+    conn.executescript(SCHEMA)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return conn
+
+def pad_row(row, width):
+    row = list(row[:width])
+    return row + [''] * (width - len(row))
+
+# CSV rows -> (key..., [seq,] fields...) tuples in the table's column order
+def rows_to_records(table, rows):
+    width = len(TABLE_COLUMNS[table])
+    review_counts = {}
+    records = []
+    for seq, row in enumerate(rows):
+        row = pad_row(row, width)
+        if table == 'reviews':
+            pid = row[0]
+            n = review_counts.get(pid, 0)
+            review_counts[pid] = n + 1
+            records.append((pid, n, *row[1:]))
+        else:
+            records.append((row[0], seq, *row[1:]))
+    return records
+
+def has_seq(table):
+    return table != 'reviews'
+
+# key columns, and the other columns of a record (seq first, if any)
+def record_columns(table):
+    keys = TABLE_KEYS[table]
+    fields = [c for c in TABLE_COLUMNS[table] if c not in keys]
+    if has_seq(table):
+        return keys, ['seq'] + fields
+    return keys, fields
+
+# seq is inserted with new rows but left alone for existing ones (see update_seq)
+def upsert_sql(table):
+    keys, values = record_columns(table)
+    columns = ', '.join(keys + values)
+    marks = ', '.join('?' * (len(keys) + len(values)))
+    fields = [c for c in values if c != 'seq']
+    updates = ', '.join(f'{c} = excluded.{c}' for c in fields)
+    changed = ' OR '.join(f'{table}.{c} IS NOT excluded.{c}' for c in fields)
+    return (f'INSERT INTO {table} ({columns}) VALUES ({marks}) '
+            f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates} WHERE {changed}')
+
+# moves rows to their new positions; only rows whose seq differs are written
+def update_seq(conn, table, records):
+    keys = TABLE_KEYS[table]
+    nkeys = len(keys)
+    where = ' AND '.join(f'{k} = ?' for k in keys)
+    conn.executemany(f'UPDATE {table} SET seq = ? WHERE {where} AND seq IS NOT ?',
+                     ((r[nkeys], *r[:nkeys], r[nkeys]) for r in records))
+
+# upserts rows (lists of CSV fields, no header) and deletes rows not present;
+# returns the number of rows inserted, updated or deleted (not just moved)
+def ingest_rows(conn, table, rows):
+    records = rows_to_records(table, rows)
+    keys, _ = record_columns(table)
+    nkeys = len(keys)
+    new_keys = set(r[:nkeys] for r in records)
+    before = conn.total_changes
+    with conn: # one transaction
+        old_keys = set(conn.execute(f'SELECT {", ".join(keys)} FROM {table}'))
+        gone = old_keys - new_keys
+        where = ' AND '.join(f'{k} = ?' for k in keys)
+        conn.executemany(f'DELETE FROM {table} WHERE {where}', gone)
+        conn.executemany(upsert_sql(table), records)
+        changes = conn.total_changes - before
+        if has_seq(table):
+            update_seq(conn, table, records)
+    return changes
+
+def csv_text_rows(contents):
+    reader = csv.reader(contents.splitlines())
+    next(reader, None) # skip header
+    return [row for row in reader if row]
+
+# rows come back as lists of CSV fields, in file order, as read_csv would return
+def read_papers_rows(conn):
+    columns = ', '.join(TABLE_COLUMNS['papers'])
+    return [list(row) for row in
+            conn.execute(f'SELECT {columns} FROM papers ORDER BY seq')]
+
+# only reviews of known papers, using the pid key; grouped by paper, in paper
+# order, and in CSV order within each paper
+def read_reviews_rows(conn):
+    columns = ', '.join(f'r.{c}' for c in TABLE_COLUMNS['reviews'])
+    sql = (f'SELECT {columns} FROM reviews r JOIN papers p ON p.pid = r.pid '
+           f'ORDER BY p.seq, r.n')
+    return [list(row) for row in conn.execute(sql)]
+
+# results: (Submission ID, Sort Score, Status, Reviews, Tags) tuples, in order
+def write_chair_results(conn, results):
+    return ingest_rows(conn, 'chair', results)